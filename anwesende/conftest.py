@@ -1,3 +1,4 @@
+import django.core.cache as djcc
 import pytest
 
 from anwesende.users.models import User
@@ -9,6 +10,12 @@ def media_storage(settings, tmpdir):
     settings.MEDIA_ROOT = tmpdir.strpath
 
 
+@pytest.fixture(autouse=True)
+def empty_cache():
+    for cache in djcc.caches.all():
+        cache.clear()  # cached ids must not outlive the test's DB content
+
+
 @pytest.fixture
 def user() -> User:
     return UserFactory()
@@ -0,0 +1,124 @@
+"""
+Lean check-in for returning visitors, whose person data come from
+the (signed, hence once-validated) visitor cookie:
+no ModelForm, no seat object, one INSERT.
+This is the hot path at every hour change.
+store() is used by all check-ins; it suppresses repeated submissions.
+"""
+import datetime as dt
+import typing as tg
+
+from django.conf import settings
+import django.core.exceptions as djce
+import django.db as djdb
+from django.db import transaction
+
+import anwesende.room.models as arm
+import anwesende.room.visitcookie as arvc
+import anwesende.room.writebehind as arwb
+import anwesende.utils.cache as aucache
+
+SEAT_ID_TIMEOUT = 24 * 3600  # seconds; seats never change their hash
+SUBMISSION_TIMEOUT = 3600  # seconds to remember a submission in the cache
+UNIQUE_SUBMISSION = 'visit_unique_submission'  # constraint on Visit
+
+_validators = {field.name: field.validators  # collected once, not per request
+               for field in arm.Visit._meta.concrete_fields
+               if field.name in arvc.FIELDS}
+_status_3g_choices = {str(key) for key, txt in arm.Visit.status_3g_basechoices
+                      if key != arm.G_TESTET}  # do not reuse a test result
+
+
+def seat_id_by_hash(hashvalue: str) -> tg.Optional[int]:
+    return aucache.get_or_compute(
+            f"seat_id:{hashvalue}", 
+            lambda: (arm.Seat.objects.filter(hash=hashvalue)
+                     .values_list('id', flat=True).first()),
+            SEAT_ID_TIMEOUT)
+
+
+def is_complete(prefill: tg.Optional[arvc.Prefill]) -> bool:
+    """Whether prefill has all person data needed for a lean check-in."""
+    if not prefill:
+        return False
+    try:
+        validate_prefill(prefill)
+    except djce.ValidationError:
+        return False
+    return True
+
+
+def validate_prefill(prefill: arvc.Prefill) -> None:
+    required = ['givenname', 'familyname', 'street_and_number', 'zipcode',
+                'town', 'phone', 'cookie']
+    if settings.USE_EMAIL_FIELD:
+        required.append('email')
+    for fieldname in required:
+        value = prefill.get(fieldname)
+        if not value:
+            raise djce.ValidationError(f"{fieldname} is missing")
+        for validator in _validators[fieldname]:
+            validator(value)
+    if settings.USE_STATUS_3G_FIELD and \
+            prefill.get('status_3g') not in _status_3g_choices:
+        raise djce.ValidationError("status_3g must be entered anew")
+
+
+def make_visit(prefill: arvc.Prefill, seat_id: int,
+               present_from_dt: dt.datetime, present_to_dt: dt.datetime
+               ) -> arm.Visit:
+    """Validated, unsaved Visit. May raise ValidationError."""
+    validate_prefill(prefill)
+    if present_from_dt > present_to_dt:
+        raise djce.ValidationError("'von'-Zeit muss vor 'bis'-Zeit liegen / "
+                                   "'from' must be before 'until'")
+    return arm.Visit(
+        givenname=prefill['givenname'], familyname=prefill['familyname'],
+        street_and_number=prefill['street_and_number'],
+        zipcode=prefill['zipcode'], town=prefill['town'],
+        phone=prefill['phone'],
+        email=prefill['email'] if settings.USE_EMAIL_FIELD else "",
+        status_3g=(int(prefill['status_3g']) if settings.USE_STATUS_3G_FIELD
+                   else arm.G_UNKNOWN),
+        cookie=prefill['cookie'],
+        present_from_dt=present_from_dt, present_to_dt=present_to_dt,
+        seat_id=seat_id)
+
+
+def store(visit: arm.Visit) -> bool:
+    """
+    Save visit now or, in write-behind mode, soon (see writebehind.py).
+    Return False (and save nothing) if the same cookie has already
+    submitted the same seat and times: a tap on submit that was repeated
+    over a flaky connection. The per-process cache catches repeats that
+    reach the same worker process before any INSERT;
+    constraint UNIQUE_SUBMISSION catches all.
+    """
+    key = None
+    if visit.cookie not in arm.NO_COOKIES:
+        key = "submission:%s:%d:%d:%d" % (
+                visit.cookie, visit.seat_id,
+                visit.present_from_dt.timestamp(), visit.present_to_dt.timestamp())
+        if not aucache.add(key, SUBMISSION_TIMEOUT):
+            return False
+    try:
+        if settings.VISIT_WRITE_BEHIND:
+            arwb.append(visit)  # flush ignores repeats
+        elif djdb.connection.in_atomic_block:
+            with transaction.atomic():  # savepoint survives IntegrityError
+                visit.save()
+        else:
+            visit.save()  # one INSERT in autocommit mode, no BEGIN/COMMIT
+    except Exception as err:
+        if (isinstance(err, djdb.IntegrityError) and
+                _constraint_name(err) == UNIQUE_SUBMISSION):
+            return False
+        if key:
+            aucache.delete(key)  # allow a retry
+        raise
+    return True
+
+
+def _constraint_name(err: djdb.IntegrityError) -> tg.Optional[str]:
+    diag = getattr(err.__cause__, 'diag', None)  # psycopg2 error details
+    return getattr(diag, 'constraint_name', None)
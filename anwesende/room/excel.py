@@ -4,13 +4,18 @@ Import also validates the proper file format.
 Export also controls which groups of visitors to include.
 """
 import collections
+from concurrent import futures
+import hashlib
+import logging
 import os
 import re
 import tempfile
 import typing as tg
 
+import django.db as djdb
 import django.db.models.query as djdmq
 from django.conf import settings
+from django.db import transaction
 
 import anwesende.room.models as arm
 import anwesende.users.models as aum
@@ -18,33 +23,129 @@ import anwesende.utils.date as aud
 import anwesende.utils.excel as aue
 
 
+IMPORT_LOCK_CLASS = 4711  # first key of the advisory locks of imports
+SEATS_PER_INSERT = 1000
+
+
 class InvalidExcelError(ValueError):
     pass  # no additional logic is needed
 
 
-def validate_excel_importfile(filename) -> None:
+def validate_excel_importfile(filename, multi_department=False) -> None:
     # may raise InvalidExcelError
     columnsdict = aue.read_excel_as_columnsdict(filename)
-    _validate_room_declarations(columnsdict)
+    _validate_room_declarations(columnsdict, multi_department)
 
 
 def create_seats_from_excel(filename: str, user: aum.User) -> arm.Importstep:
     columnsdict = aue.read_excel_as_columnsdict(filename)
     _validate_room_declarations(columnsdict)
-    importstep = _create_importstep(user)
-    rooms, importstep.num_new_rooms, importstep.num_existing_rooms = \
-        _find_or_create_rooms(columnsdict, importstep)
-    seats, importstep.num_new_seats, importstep.num_existing_seats = \
-        _find_or_create_seats(rooms)
-    importstep.save()
+    return _create_seats(columnsdict, user)
+
+
+DepartmentResult = tg.Tuple[str, str, tg.Union[arm.Importstep, Exception]]
+
+
+def create_seats_from_excel_by_department(filename: str, user: aum.User
+                                          ) -> tg.List[DepartmentResult]:
+    """
+    Import a workbook with rooms of several departments:
+    one Importstep (and transaction) per department, processed by up to
+    import_workers() threads, each with its own database connection.
+    Returns (organization, department, importstep or exception) per department,
+    in order of appearance.
+    """
+    columnsdict = aue.read_excel_as_columnsdict(filename)
+    _validate_room_declarations(columnsdict, multi_department=True)
+    parts = _split_by_department(columnsdict)
+
+    def create(orgdept: tg.Tuple[str, str]) -> DepartmentResult:
+        try:
+            return (*orgdept, _create_seats(parts[orgdept], user))
+        except Exception as err:
+            logging.getLogger('error').error(f"import of {orgdept} failed", exc_info=err)
+            return (*orgdept, err)
+        finally:
+            if threaded:
+                djdb.connection.close()  # this thread's, e.g. return it to the pool
+
+    workers = import_workers()
+    threaded = workers > 1 and len(parts) > 1
+    if not threaded:
+        return [create(orgdept) for orgdept in parts]
+    with futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(create, parts))
+
+
+def import_workers() -> int:
+    """
+    settings.IMPORT_WORKERS, but with a connection pool at most as many
+    as it has connections beyond the ADMISSION_SLOTS requests'.
+    Admission control does not count the import threads.
+    """
+    pool = settings.DATABASES[djdb.DEFAULT_DB_ALIAS].get('POOL')
+    if not pool:
+        return settings.IMPORT_WORKERS
+    return min(settings.IMPORT_WORKERS, pool['SIZE'] - settings.ADMISSION_SLOTS)
+
+
+def _create_seats(columnsdict: aue.Columnsdict, user: aum.User) -> arm.Importstep:
+    organization, department = columnsdict['organization'][0], columnsdict['department'][0]
+    with transaction.atomic():  # all or nothing, but not the Excel parsing
+        _lock_department(organization, department)
+        # earlier Importsteps from which rooms may move to this one:
+        earlier_steps = set(arm.Room.objects
+                            .filter(organization=organization, department=department)
+                            .values_list('importstep_id', flat=True).distinct())
+        importstep = _create_importstep(user)
+        importstep.organization, importstep.department = organization, department
+        rooms, importstep.num_new_rooms, importstep.num_existing_rooms = \
+            _find_or_create_rooms(columnsdict, importstep)
+        importstep.num_new_seats, importstep.num_existing_seats = \
+            _find_or_create_seats(rooms)
+        importstep.save()
+        arm.Importstep.recount_qrcodes(earlier_steps | {importstep.pk})
+        importstep.refresh_from_db(fields=['num_qrcodes'])
     return importstep
 
 
-def _validate_room_declarations(columndict: aue.Columnsdict):
+def _split_by_department(columnsdict: aue.Columnsdict
+                         ) -> tg.Dict[tg.Tuple[str, str], aue.Columnsdict]:
+    result: tg.Dict[tg.Tuple[str, str], aue.Columnsdict] = {}
+    rows = zip(columnsdict['organization'], columnsdict['department'])
+    for idx, orgdept in enumerate(rows):
+        if orgdept not in result:
+            part: tg.Dict[str, tg.List] = collections.OrderedDict(
+                    (colname, []) for colname in columnsdict)
+            part.has_been_validated = True  # type: ignore  # as a whole
+            result[orgdept] = part
+        for colname, values in columnsdict.items():
+            result[orgdept][colname].append(values[idx])
+    return result
+
+
+def _lock_department(organization: str, department: str) -> None:
+    """
+    Wait until no other import for this department is running;
+    hold the lock until the end of the transaction.
+    Imports for other departments are not affected.
+    """
+    with djdb.connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)",
+                       [IMPORT_LOCK_CLASS, _department_key(organization, department)])
+
+
+def _department_key(organization: str, department: str) -> int:
+    digest = hashlib.sha256(f"{organization};{department}".encode()).digest()
+    return int.from_bytes(digest[:4], 'big', signed=True)  # a Postgres int4
+
+
+def _validate_room_declarations(columndict: aue.Columnsdict, multi_department=False):
     if getattr(columndict, 'has_been_validated', False): 
         return
     _validate_columnlist(columndict)
-    _validate_single_department(columndict)
+    if not multi_department:
+        _validate_single_department(columndict)
     _validate_dist(columndict, 'row_dist')
     _validate_dist(columndict, 'seat_dist')
     _validate_seatrange(columndict)
@@ -157,27 +258,33 @@ def _find_or_create_rooms(
     return (result, newN, existingN)
 
 
-def _find_or_create_seats(rooms: tg.Sequence[arm.Room]) \
-        -> tg.Tuple[tg.Sequence[arm.Seat], int, int]:
-    result = []
-    newN = existingN = 0
+def _find_or_create_seats(rooms: tg.Sequence[arm.Room]) -> tg.Tuple[int, int]:
+    """
+    Insert all seats of rooms with few multi-row INSERTs.
+    Seats that exist (also if a concurrent import has just inserted them)
+    are skipped via constraint seat_unique_position.
+    Returns the numbers of new and of existing seats.
+    """
+    values = []
     for room in rooms:
         maxrow, maxseat = arm.Seat.split_seatname(room.seat_last)
         for rownum in range(1, maxrow + 1):
             for seatnum in range(1, maxseat + 1):
-                seat, created = arm.Seat.objects.get_or_create(
-                    rownumber=rownum,
-                    seatnumber=seatnum,
-                    room=room,
-                    defaults=dict(hash=arm.Seat.seathash(
-                        room, arm.Seat.form_seatname(rownum, seatnum)))
-                )
-                result.append(seat)
-                if created:
-                    newN += 1
-                else:
-                    existingN += 1
-    return (result, newN, existingN)
+                values.append((room.pk, rownum, seatnum, arm.Seat.seathash(
+                    room, arm.Seat.form_seatname(rownum, seatnum))))
+    newN = 0
+    with djdb.connection.cursor() as cursor:
+        for start in range(0, len(values), SEATS_PER_INSERT):
+            batch = values[start:start + SEATS_PER_INSERT]
+            cursor.execute(
+                f"INSERT INTO {arm.Seat._meta.db_table} "
+                "(room_id, rownumber, seatnumber, hash) VALUES " +
+                ", ".join(["(%s, %s, %s, %s)"] * len(batch)) +
+                " ON CONFLICT ON CONSTRAINT seat_unique_position DO NOTHING"
+                " RETURNING id",
+                [field for seat in batch for field in seat])
+            newN += len(cursor.fetchall())
+    return (newN, len(values) - newN)
 
 
 def _excelerror(row: int = None, column: str = None,
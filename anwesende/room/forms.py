@@ -78,6 +78,9 @@ class UploadFileForm(djf.Form):
     (This is a departure from normal Django application architecture.)
     """
     file = djf.FileField(required=True)
+    multi_department = djf.BooleanField(
+        required=False,
+        label="Mehrere Hochschuleinheiten (je ein Import, parallel eingelesen)")
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -100,7 +103,8 @@ class UploadFileForm(djf.Form):
             logger.warning(msg)
             raise djce.ValidationError(msg)
         try:
-            are.validate_excel_importfile(excelfile)  # stores models iff valid
+            are.validate_excel_importfile(  # stores models iff valid
+                    excelfile, self.cleaned_data.get('multi_department', False))
         except are.InvalidExcelError as err:
             logger.error("InvalidExcelError({uploadedfile})", exc_info=err)
             raise djce.ValidationError(err)
@@ -145,6 +149,7 @@ class VisitForm(djf.ModelForm):
         label="Anwesenheit geplant bis / Intend to be present until",
         help_text="Uhrzeit im Format hh:mm oder hhmm, z.B. 17:45 oder 1745 / time of day, e.g. 15:15 or 1515",
     )
+    token = djf.CharField(required=False, widget=djfw.HiddenInput())  # see RenderThankyou
 
     def __init__(self, *args, **kwargs):
         #--- do not reuse a G_TESTET value from the cookie:
@@ -0,0 +1,46 @@
+import datetime as dt
+import logging
+import typing as tg
+
+import django.core.management.base as djcmb
+import django.utils.timezone as djut
+
+import anwesende.room.models as arm
+
+PERSON_FIELDS = ('cookie', 'phone', 'givenname', 'familyname',
+                 'street_and_number', 'zipcode', 'town', 'email', 'status_3g')
+
+
+class Command(djcmb.BaseCommand):
+    help = ("Deletes Visits of a person at a seat that another Visit of the same "
+            "person at the same seat fully contains (as created by re-scanning). "
+            "Merely overlapping Visits are kept: merging them could create "
+            "contacts of MIN_OVERLAP_MINUTES that no single visit had.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=48,
+                            help="only consider visits that ended less than this long ago")
+
+    def handle(self, *args, **options):
+        horizon = djut.localtime() - dt.timedelta(hours=options.get('hours', 48))
+        visits = (arm.Visit.objects
+                  .filter(present_to_dt__gte=horizon)
+                  .exclude(cookie__in=arm.NO_COOKIES)
+                  .only('seat_id', 'present_from_dt', 'present_to_dt', *PERSON_FIELDS)
+                  .order_by('seat_id', *PERSON_FIELDS,
+                            'present_from_dt', '-present_to_dt', 'pk'))
+        to_delete: tg.List[int] = []
+        kept: tg.Optional[arm.Visit] = None  # the visit that ends last so far
+        kept_key = None
+        for visit in visits.iterator():
+            key = (visit.seat_id, *(getattr(visit, f) for f in PERSON_FIELDS))
+            if kept is not None and key == kept_key and \
+                    visit.present_to_dt <= kept.present_to_dt:  # kept contains visit
+                to_delete.append(visit.pk)
+            else:
+                kept, kept_key = visit, key
+        # Whatever overlaps a deleted visit long enough also overlaps the
+        # containing one (with the same person data) at least as long.
+        arm.Visit.objects.filter(pk__in=to_delete).delete()
+        logging.info("coalesce_visits: deleted %d visit entries contained in others" %
+                     len(to_delete))
@@ -0,0 +1,13 @@
+import logging
+
+import django.core.management.base as djcmb
+
+import anwesende.room.writebehind as arwb
+
+
+class Command(djcmb.BaseCommand):
+    help = "Inserts the visits journaled in write-behind mode (settings.VISIT_WRITE_BEHIND)."
+
+    def handle(self, *args, **options):
+        howmany = arwb.flush()
+        logging.info("flush_visit_journal: inserted %d visits" % howmany)
@@ -0,0 +1,126 @@
+import datetime as dt
+import re
+import time
+import types
+import typing as tg
+
+import django.core.management.base as djcmb
+import django.db as djdb
+import django.utils.timezone as djut
+
+import anwesende.room.models as arm
+import anwesende.room.reports as arr
+import anwesende.room.views as arv
+import anwesende.utils.slowquery as auslow
+
+TABLES = (arm.Visit._meta.db_table, arm.Seat._meta.db_table, arm.Room._meta.db_table)
+LARGE_TABLE_ROWS = 10000  # sequential scans on smaller tables are harmless
+SCAN_RE = re.compile(r"((?:Parallel )?Seq Scan on \w+|"
+                     r"(?:Bitmap )?Index (?:Only )?Scan (?:using|on) \w+(?: on \w+)?)")
+
+Query = tg.Tuple[str, tg.Any, float]  # sql, params, seconds
+
+
+class Command(djcmb.BaseCommand):
+    help = ("Runs the app's hot queries against the current data and prints "
+            "row counts, timings, and plan summaries. "
+            "Flags likely missing and unused indexes on Visit, Seat, and Room. "
+            "Run it after delete_outdated_data to notice plan regressions.")
+
+    def handle(self, *args, **options):
+        visit = (arm.Visit.objects.select_related('seat__room')
+                 .order_by('-pk').first())
+        if visit is None:
+            self.stdout.write("query_doctor: no visits, nothing to examine")
+        else:
+            self.stdout.write(f"query_doctor: sample visit {visit.pk}, "
+                              f"room {visit.seat.room.descriptor}")
+            tablesizes = self.tablesizes()
+            for name, func in self.cases(visit):
+                self.examine(name, func, tablesizes)
+        self.check_indexes()
+
+    def cases(self, visit: arm.Visit
+              ) -> tg.List[tg.Tuple[str, tg.Callable[[], tg.Iterable]]]:
+        now = djut.localtime()
+        room = visit.seat.room
+        search = arv.SearchView()
+        search.is_datenverwalter = True
+        search.form = types.SimpleNamespace(cleaned_data=dict(
+                roomdescriptor="%", givenname="%", familyname=visit.familyname[:3] + "%",
+                phone="%", email="%",
+                from_date=(now - dt.timedelta(days=14)).date(),
+                to_date=(now + dt.timedelta(days=1)).date()))
+        return [
+            ("Visit.get_overlapping_visits", visit.get_overlapping_visits),
+            ("Visit.visits_in_timerange_qs", lambda: arm.Visit.visits_in_timerange_qs(
+                    now - dt.timedelta(hours=24), now)),
+            ("SearchView.get_queryset", search.get_queryset),
+            ("reports.visitors_by_week_report", lambda: arr.visitors_by_week_report(
+                    f"{room.organization};%")),
+            ("Room.current_unique_visitors_qs", room.current_unique_visitors_qs),
+            ("Importstep.displayable_importsteps", lambda: arm.Importstep
+                    .displayable_importsteps(dt.timedelta(days=8))),
+        ]
+
+    def examine(self, name: str, func: tg.Callable[[], tg.Iterable],
+                tablesizes: tg.Mapping[str, int]) -> None:
+        queries: tg.List[Query] = []
+
+        def record(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries.append((sql, params, time.perf_counter() - start))
+
+        start = time.perf_counter()
+        with djdb.connection.execute_wrapper(record):  # type: ignore  # no CM in stubs
+            rows = len(list(func()))
+        seconds = time.perf_counter() - start
+        self.stdout.write(f"\n{name}: {rows} rows, {len(queries)} queries, "
+                          f"{1000 * seconds:.1f}ms")
+        if not queries:
+            return
+        sql, params, slowest = max(queries, key=lambda q: q[2])
+        plan = auslow.explain(djdb.DEFAULT_DB_ALIAS, sql, params).split("\n")
+        scans = list(dict.fromkeys(SCAN_RE.findall("\n".join(plan))))
+        self.stdout.write(f"  slowest query {1000 * slowest:.1f}ms: {plan[0].strip()}")
+        self.stdout.write(f"  scans: {'; '.join(scans) or '-'}")
+        for line in plan:
+            if line.startswith("Execution Time"):
+                self.stdout.write(f"  {line}")
+        for scan in scans:
+            table = scan.rsplit(" ", 1)[-1]
+            if "Seq Scan" in scan and tablesizes.get(table, 0) >= LARGE_TABLE_ROWS:
+                self.stdout.write(f"  WARNING: sequential scan of {table} "
+                                  f"({tablesizes[table]} rows)")
+
+    def tablesizes(self) -> tg.Dict[str, int]:
+        with djdb.connection.cursor() as cursor:
+            cursor.execute("SELECT relname, reltuples::bigint FROM pg_class "
+                           "WHERE relname IN %s", [TABLES])
+            return dict(cursor.fetchall())
+
+    def check_indexes(self) -> None:
+        """Report from PostgreSQL's cumulative statistics (since their last reset)."""
+        self.stdout.write("\nindexes:")
+        with djdb.connection.cursor() as cursor:
+            cursor.execute("SELECT relname, n_live_tup, seq_scan, idx_scan "
+                           "FROM pg_stat_user_tables WHERE relname IN %s "
+                           "ORDER BY relname", [TABLES])
+            for table, rows, seq_scans, idx_scans in cursor.fetchall():
+                self.stdout.write(f"  {table}: {rows} rows, {seq_scans} sequential scans, "
+                                  f"{idx_scans or 0} index scans")
+                if rows >= LARGE_TABLE_ROWS and seq_scans > (idx_scans or 0):
+                    self.stdout.write(f"  WARNING: {table} is mostly scanned "
+                                      f"sequentially: index missing?")
+            cursor.execute("SELECT s.relname, s.indexrelname, "
+                           "       pg_size_pretty(pg_relation_size(s.indexrelid)) "
+                           "FROM pg_stat_user_indexes s "
+                           "JOIN pg_index i ON i.indexrelid = s.indexrelid "
+                           "WHERE s.relname IN %s AND s.idx_scan = 0 "
+                           "  AND NOT i.indisunique AND NOT i.indisprimary "
+                           "ORDER BY s.relname, s.indexrelname", [TABLES])
+            for table, index, size in cursor.fetchall():
+                self.stdout.write(f"  unused index on {table}: {index} ({size})")
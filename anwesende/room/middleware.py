@@ -0,0 +1,220 @@
+"""
+MetricsMiddleware: latency, DB queries, and DB time per view, see utils/metrics.py.
+
+ProfilingMiddleware: profile single requests of Datenverwalters on demand.
+
+SlowQueryMiddleware: log slow queries and their plans, see utils/slowquery.py.
+
+Admission control (settings.ADMISSION_CONTROL) per worker process:
+Each controlled request needs one of ADMISSION_SLOTS slots
+(GUNICORN_THREADS - 1 by default, so one thread is always left
+for uncontrolled requests and the slots are really contended). Heavy Datenverwalter views additionally
+need one of the ADMISSION_HEAVY_SLOTS heavy slots, so they can never take
+away more than that many threads (and DB connections) from check-ins.
+Requests that get no slot within their lane's waiting time are
+answered with 503 and Retry-After; for check-ins this happens only when
+all slots are busy for ADMISSION_CHECKIN_WAIT_SECONDS.
+Other requests (home page, login, static files) are not controlled.
+"""
+import contextlib
+import cProfile
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+import typing as tg
+
+from django.conf import settings
+import django.core.exceptions as djce
+import django.db as djdb
+import django.http as djh
+import django.shortcuts as djs
+
+import anwesende.utils.metrics as aumet
+import anwesende.utils.slowquery as auslow
+
+CHECKIN = 'checkin'
+HEAVY = 'heavy'
+LANES = {  # URL name -> lane
+    'visit': CHECKIN, 'visit-quick': CHECKIN,
+    'thankyou': CHECKIN, 'thankyouseats': CHECKIN,
+    'search': HEAVY, 'searchroom': HEAVY,
+    'report_dept': HEAVY, 'report_week': HEAVY, 'import': HEAVY,
+    'qrcodes-byimport': HEAVY, 'qrcodes-byorgdepbld': HEAVY,
+    'qrcodes-byorgdepbldrm': HEAVY,
+}
+RETRY_AFTER = {CHECKIN: 5, HEAVY: 30}  # seconds
+
+
+@contextlib.contextmanager
+def wrapped_connections(wrapper: tg.Callable) -> tg.Iterator[None]:
+    """Install the execute_wrapper on all of this thread's database connections."""
+    with contextlib.ExitStack() as stack:
+        for connection in djdb.connections.all():
+            stack.enter_context(connection.execute_wrapper(wrapper))  # type: ignore  # no CM in stubs
+        yield
+
+
+class AdmissionControlMiddleware:
+    def __init__(self, get_response):
+        if not settings.ADMISSION_CONTROL:
+            raise djce.MiddlewareNotUsed()
+        self.get_response = get_response
+        self.slots = threading.BoundedSemaphore(settings.ADMISSION_SLOTS)
+        self.heavy_slots = threading.BoundedSemaphore(settings.ADMISSION_HEAVY_SLOTS)
+        self.waits = {CHECKIN: settings.ADMISSION_CHECKIN_WAIT_SECONDS,
+                      HEAVY: settings.ADMISSION_HEAVY_WAIT_SECONDS}
+
+    def __call__(self, request: djh.HttpRequest) -> djh.HttpResponse:
+        request.admission_slots = []  # type: ignore[attr-defined]
+        try:
+            return self.get_response(request)
+        finally:
+            for slot in request.admission_slots:  # type: ignore[attr-defined]
+                slot.release()
+
+    def process_view(self, request, view_func, view_args, view_kwargs
+                     ) -> tg.Optional[djh.HttpResponse]:
+        lane = LANES.get(request.resolver_match.url_name)
+        if not lane:
+            return None
+        needed = [self.heavy_slots, self.slots] if lane == HEAVY else [self.slots]
+        for slot in needed:
+            if not slot.acquire(timeout=self.waits[lane]):
+                logging.warning(f"AdmissionControl: {lane} request shed: {request.path}")
+                return self.busy_response(request, lane)
+            request.admission_slots.append(slot)
+        return None
+
+    def busy_response(self, request: djh.HttpRequest, lane: str) -> djh.HttpResponse:
+        response = djs.render(request, "room/busy.html", 
+                              dict(settings=settings, retry_after=RETRY_AFTER[lane]),
+                              status=503)
+        response['Retry-After'] = str(RETRY_AFTER[lane])
+        return response
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: djh.HttpRequest) -> djh.HttpResponse:
+        dbstats = dict(queries=0, seconds=0.0)
+
+        def count_query(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                dbstats['queries'] += 1
+                dbstats['seconds'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        with wrapped_connections(count_query):
+            response = self.get_response(request)
+        match = request.resolver_match
+        view = match.view_name if match and match.namespace == 'room' else "other"
+        aumet.observe('anwesende_request_seconds', time.perf_counter() - start, view=view)
+        aumet.inc('anwesende_requests_total', view=view, status=str(response.status_code))
+        aumet.inc('anwesende_db_queries_total', dbstats['queries'], view=view)
+        aumet.inc('anwesende_db_seconds_total', dbstats['seconds'], view=view)
+        aumet.maybe_dump()
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    A request of a Datenverwalter with header X-Anwesende-Profile
+    or query parameter profile=1 runs under cProfile with all its SQL recorded.
+    The results go to PROFILE_DIR: a .prof file (for pstats, snakeviz etc.)
+    and a .txt summary, named in the response header X-Anwesende-Profile.
+    Other requests only pay for checking the header and parameter.
+    """
+    HEADER = 'HTTP_X_ANWESENDE_PROFILE'
+    SQL_MAXLENGTH = 2000  # characters per statement in the summary
+
+    def __init__(self, get_response):
+        if not settings.PROFILE_DIR:
+            raise djce.MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request: djh.HttpRequest) -> djh.HttpResponse:
+        if (self.HEADER in request.META or request.GET.get('profile') == "1") and \
+                request.user.is_authenticated and request.user.is_datenverwalter():
+            return self.profiled_response(request)
+        return self.get_response(request)
+
+    def profiled_response(self, request: djh.HttpRequest) -> djh.HttpResponse:
+        statements: tg.List[tg.Tuple[str, float, str]] = []  # alias, seconds, sql
+
+        def record_sql(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                statements.append((context['connection'].alias, 
+                                   time.perf_counter() - start, 
+                                   f"{sql} -- {params!r}"[:self.SQL_MAXLENGTH]))
+
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        with wrapped_connections(record_sql):
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        duration = time.perf_counter() - start
+        basename = self.write_profile(request, profiler, statements, duration)
+        response['X-Anwesende-Profile'] = basename
+        logging.info(f"ProfilingMiddleware: {request.path} profiled into {basename}")
+        return response
+
+    def write_profile(self, request: djh.HttpRequest, profiler: cProfile.Profile,
+                      statements: tg.List[tg.Tuple[str, float, str]], 
+                      duration: float) -> str:
+        match = request.resolver_match
+        viewname = match.url_name if match else "other"
+        basename = "%s-%s-%d" % (time.strftime("%Y-%m-%d_%H.%M.%S"), viewname, os.getpid())
+        os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+        path = os.path.join(settings.PROFILE_DIR, basename)
+        profiler.dump_stats(path + ".prof")
+        stats_text = io.StringIO()
+        pstats.Stats(profiler, stream=stats_text).sort_stats('cumulative').print_stats(40)
+        sql_seconds = sum(seconds for alias, seconds, sql in statements)
+        with open(path + ".txt", 'w', encoding='utf8') as f:
+            f.write(f"{request.method} {request.get_full_path()} by {request.user}\n")
+            f.write(f"{duration:.3f}s total, {len(statements)} SQL statements "
+                    f"taking {sql_seconds:.3f}s\n\n")
+            for alias, seconds, sql in statements:
+                f.write(f"{seconds:8.4f}s [{alias}] {sql}\n")
+            f.write("\n")
+            f.write(stats_text.getvalue())
+        return basename
+
+
+class SlowQueryMiddleware:
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_MS:
+            raise djce.MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request: djh.HttpRequest) -> djh.HttpResponse:
+        threshold = settings.SLOW_QUERY_MS / 1000.0
+
+        def watch_query(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                seconds = time.perf_counter() - start
+                if seconds >= threshold and not many:
+                    match = request.resolver_match
+                    auslow.capture(match.view_name if match else request.path,
+                                   context['connection'].alias, sql, params, seconds)
+
+        with wrapped_connections(watch_query):
+            response = self.get_response(request)
+        return response
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.8 on 2026-10-19 10:12
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('room', '0012_room_descriptor_DATA'),
+    ]
+
+    operations = [
+        # keep only the first of repeatedly submitted visits:
+        migrations.RunSQL(
+            """
+            DELETE FROM room_visit AS dupl USING room_visit AS orig
+            WHERE dupl.cookie NOT IN ('', 'none') AND dupl.cookie = orig.cookie
+              AND dupl.seat_id = orig.seat_id
+              AND dupl.present_from_dt = orig.present_from_dt
+              AND dupl.present_to_dt = orig.present_to_dt
+              AND dupl.id > orig.id
+            """,
+            reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.8 on 2026-10-19 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('room', '0013_visit_repeated_submissions_DATA'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='visit',
+            constraint=models.UniqueConstraint(condition=models.Q(('cookie__in', ('', 'none')), _negated=True), fields=('cookie', 'seat', 'present_from_dt', 'present_to_dt'), name='visit_unique_submission'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 3.2.8 on 2026-10-19 18:54
+
+import anwesende.utils.validators
+import django.core.validators
+from django.db import migrations, models
+import re
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('room', '0013_visit_unique_submission'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='visit',
+            name='email',
+            field=models.EmailField(blank=True, help_text='Bitte immer die gleiche benutzen! / Please use the same one each time', max_length=80, verbose_name='Emailadresse / Email address'),
+        ),
+        migrations.AlterField(
+            model_name='visit',
+            name='familyname',
+            field=models.CharField(help_text='Wie im Ausweis angegeben / as shown in your passport (Latin script)', max_length=80, validators=[anwesende.utils.validators.validate_isprintable], verbose_name='Familienname / Family name'),
+        ),
+        migrations.AlterField(
+            model_name='visit',
+            name='givenname',
+            field=models.CharField(help_text='Rufname / the firstname by which you are commonly known', max_length=80, validators=[anwesende.utils.validators.validate_isprintable], verbose_name='Vorname / Given name'),
+        ),
+        migrations.AlterField(
+            model_name='visit',
+            name='phone',
+            field=models.CharField(help_text="Mit Ländervorwahl, z.B. +49 151... in Deutschland / With country code, starting with '+'", max_length=80, validators=[django.core.validators.RegexValidator(flags=re.RegexFlag['ASCII'], message='Falsches Format für eine Telefonnummer / Wrong format as a phone number', regex='^\\+\\d\\d[\\d /-]+$')], verbose_name='Mobilfunknummer / Mobile phone number'),
+        ),
+        migrations.AlterField(
+            model_name='visit',
+            name='present_from_dt',
+            field=models.DateTimeField(max_length=80),
+        ),
+        migrations.AlterField(
+            model_name='visit',
+            name='present_to_dt',
+            field=models.DateTimeField(max_length=80),
+        ),
+        migrations.AlterField(
+            model_name='visit',
+            name='street_and_number',
+            field=models.CharField(help_text="Wohnadresse für diese Woche / This week's living address", max_length=80, validators=[anwesende.utils.validators.validate_isprintable], verbose_name='Straße und Hausnummer / Street and number'),
+        ),
+        migrations.AlterField(
+            model_name='visit',
+            name='town',
+            field=models.CharField(max_length=80, validators=[anwesende.utils.validators.validate_isprintable], verbose_name='Ort / Town'),
+        ),
+        migrations.AlterField(
+            model_name='visit',
+            name='zipcode',
+            field=models.CharField(max_length=80, validators=[django.core.validators.RegexValidator(flags=re.RegexFlag['ASCII'], message='5 Ziffern bitte / 5 digits, please', regex='^\\d{5}$')], verbose_name='Postleitzahl / Postal code'),
+        ),
+        migrations.AddIndex(
+            model_name='visit',
+            index=models.Index(fields=['present_from_dt', 'present_to_dt'], name='visit_present_from_to'),
+        ),
+        migrations.AddIndex(
+            model_name='visit',
+            index=models.Index(fields=['present_to_dt', 'present_from_dt'], name='visit_present_to_from'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.8 on 2026-10-19 18:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('room', '0014_visit_indexes'),
+    ]
+
+    operations = [
+        # no duplicates can exist: the unique Seat.hash derives from room and seat name
+        migrations.AddConstraint(
+            model_name='seat',
+            constraint=models.UniqueConstraint(fields=('room', 'rownumber', 'seatnumber'), name='seat_unique_position'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.8 on 2026-10-19 19:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('room', '0015_seat_unique_position'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importstep',
+            name='department',
+            field=models.CharField(blank=True, default='', max_length=80),
+        ),
+        migrations.AddField(
+            model_name='importstep',
+            name='num_qrcodes',
+            field=models.IntegerField(default=0, help_text='number of seats in the rooms that (still) belong to this step'),
+        ),
+        migrations.AddField(
+            model_name='importstep',
+            name='organization',
+            field=models.CharField(blank=True, default='', max_length=80),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 3.2.8 on 2026-10-19 21:20
+
+from django.db import migrations
+from django.db.models import Count, Max
+
+
+def compute_importstep_counts(apps, schema_editor):
+    Importstep = apps.get_model('room', 'Importstep')
+    # must agree with excel._create_seats() and Importstep.recount_qrcodes():
+    for step in Importstep.objects.annotate(
+            org=Max('room__organization'), dept=Max('room__department'),
+            seats=Count('room__seat')):
+        step.organization = step.org or ""
+        step.department = step.dept or ""
+        step.num_qrcodes = step.seats
+        step.save(update_fields=['organization', 'department', 'num_qrcodes'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('room', '0016_importstep_counts'),
+    ]
+
+    operations = [
+        migrations.RunPython(compute_importstep_counts),  # no backward migration is needed
+    ]
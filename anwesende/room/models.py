@@ -10,7 +10,9 @@ import django.db.models.query as djdmq
 import django.utils.timezone as djut
 import strgen
 from django.conf import settings
-from django.db.models import Count, Max
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import Coalesce
 from django.db.models.query import F
 
 import anwesende.users.models as aum
@@ -21,32 +23,50 @@ FIELDLENGTH = 80
 
 
 class Importstep(djdm.Model):
-    """Each Importstep corresponds to one set of QR-Codes created."""
+    """
+    Each Importstep corresponds to one set of QR-Codes created.
+    organization, department, and num_qrcodes are copies from its Rooms
+    and Seats, maintained by the import (see excel.py), 
+    so that the import page need not aggregate all seats.
+    """
     when = djdm.DateTimeField(auto_now_add=True)  # creation timestamp
     user = djdm.ForeignKey(null=False, to=aum.User, on_delete=djdm.PROTECT)
+    organization = djdm.CharField(blank=True, null=False, max_length=FIELDLENGTH,
+                                  default="")
+    department = djdm.CharField(blank=True, null=False, max_length=FIELDLENGTH,
+                                default="")
     num_new_rooms = djdm.IntegerField(null=False, default=0)
     num_new_seats = djdm.IntegerField(null=False, default=0)
     num_existing_rooms = djdm.IntegerField(null=False, default=0)
     num_existing_seats = djdm.IntegerField(null=False, default=0)
+    num_qrcodes = djdm.IntegerField(null=False, default=0,
+            help_text="number of seats in the rooms that (still) belong to this step")
     
     def __str__(self):
         return (f"{self.num_new_rooms}+{self.num_new_seats} imported "
                 + f"by {self.user.username}, "        
                 + f"{self.num_existing_rooms}+{self.num_existing_seats} pre-existing")
 
+    @property
+    def num_qrcodes_moved(self) -> int:
+        """QR codes whose rooms have been taken over by a later Importstep."""
+        return self.num_new_seats + self.num_existing_seats - self.num_qrcodes
+
     @classmethod
     def displayable_importsteps(cls, interval: dt.timedelta) -> tg.List['Importstep']:
-        steps = list(cls.objects.filter(
-            when__gt=djut.localtime() - interval) \
-            .annotate(organization=Max('room__organization')) \
-            .annotate(department=Max('room__department')) \
-            .annotate(num_qrcodes=Count('room__seat')) \
-            .order_by('when'))
-        for step in steps:
-            step.num_qrcodes_moved = (step.num_new_seats +   # type: ignore
-                                      step.num_existing_seats - 
-                                      step.num_qrcodes)
-        return steps
+        return list(cls.objects.filter(when__gt=djut.localtime() - interval)
+                    .select_related('user').order_by('when'))
+
+    @classmethod
+    def recount_qrcodes(cls, pks: tg.Iterable[int]) -> None:
+        """Set num_qrcodes of these Importsteps from their current seats."""
+        seats = (Seat.objects.filter(room__importstep=djdm.OuterRef('pk'))
+                 .order_by().values('room__importstep')
+                 .annotate(**{'n': Count('pk')})  # not n=: crashes the mypy django plugin
+                 .values('n'))
+        cls.objects.filter(pk__in=list(pks)).update(
+            num_qrcodes=Coalesce(djdm.Subquery(seats), 0))
+
 
 class Room(djdm.Model):
     """
@@ -126,6 +146,11 @@ class Seat(djdm.Model):
     """
     One seat in a Room. Each QR code refers to one Seat.
     """
+    # ----- Options:
+    class Meta:
+        constraints = [djdm.UniqueConstraint(  # arbiter for excel._find_or_create_seats
+            name='seat_unique_position',
+            fields=['room', 'rownumber', 'seatnumber'])]
     # ----- Fields:
     seatnumber = djdm.IntegerField(null=False)
     rownumber = djdm.IntegerField(null=False)
@@ -148,6 +173,15 @@ class Seat(djdm.Model):
     def exists(cls, hashvalue):
         return cls.objects.filter(hash=hashvalue).exists()
 
+    @classmethod
+    def listing_qs(cls, **filters) -> djdmq.QuerySet:
+        """Seats with their room and importstep (one query), in printing order."""
+        return (cls.objects.filter(**filters)
+                .select_related('room__importstep')
+                .order_by('room__organization', 'room__department',
+                          'room__building', 'room__room',
+                          'rownumber', 'seatnumber'))
+
     def distance_in_m(self, otherseat: 'Seat') -> float:
         # Seats are assumed to be on an exact cartesian grid, 
         # which is a slightly optimistic assumption.
@@ -166,6 +200,7 @@ class Seat(djdm.Model):
         return all_dummyseats.select_related('room__importstep').get()
 
     @classmethod
+    @transaction.atomic
     def _make_dummyseat(cls, dummyorg: str) -> 'Seat':
         DUMMYSEAT_NAME = cls.form_seatname(1, 1)  # "r1s1"
         DUMMYSEAT_ROW_DIST = 1.1
@@ -174,9 +209,10 @@ class Seat(djdm.Model):
         user = aum.User.objects.create(name="dummy", username="dummy", 
                                        first_name="D.", last_name="dummy", email="",
                                        is_active=False)
-        step = Importstep.objects.create(num_new_rooms=1, num_new_seats=1,
+        step = Importstep.objects.create(organization=dummyorg, department="dummydept",
+                                         num_new_rooms=1, num_new_seats=1,
                                          num_existing_rooms=0, num_existing_seats=0,
-                                         user=user)
+                                         num_qrcodes=1, user=user)
         room = Room.objects.create(organization=dummyorg, department="dummydept", 
                                    building="dummybldg", 
                                    room="dummyroom",
@@ -227,6 +263,7 @@ G_NESEN = 24
 G_TESTET = 26
 G_OTHER = 87
 G_UNKNOWN = 88
+NO_COOKIES = ("", "none")  # Visit.cookie values that identify nobody
 
 class Visit(djdm.Model):
     """
@@ -235,11 +272,21 @@ class Visit(djdm.Model):
     There is no notion of person, only the fields in this record that
     describe a person. 
     """
+    # ----- Options:
+    class Meta:
+        constraints = [djdm.UniqueConstraint(  # repeated submissions, see checkin.store()
+            name='visit_unique_submission',
+            fields=['cookie', 'seat', 'present_from_dt', 'present_to_dt'],
+            condition=~djdm.Q(cookie__in=NO_COOKIES))]
+        indexes = [  # only what the time-bounded queries need, see tests/indexbench.py
+            djdm.Index(name='visit_present_from_to',
+                       fields=['present_from_dt', 'present_to_dt']),
+            djdm.Index(name='visit_present_to_from',
+                       fields=['present_to_dt', 'present_from_dt'])]
     # ----- Fields:
     givenname = djdm.CharField(
         blank=False, null=False,
         max_length=FIELDLENGTH,
-        db_index=True,
         validators=[auv.validate_isprintable],
         verbose_name="Vorname / Given name",
         help_text="Rufname / the firstname by which you are commonly known",
@@ -247,7 +294,6 @@ class Visit(djdm.Model):
     familyname = djdm.CharField(
         blank=False, null=False,
         max_length=FIELDLENGTH,
-        db_index=True,
         validators=[auv.validate_isprintable],
         verbose_name="Familienname / Family name",
         help_text="Wie im Ausweis angegeben / as shown in your passport (Latin script)",
@@ -255,7 +301,6 @@ class Visit(djdm.Model):
     street_and_number = djdm.CharField(
         blank=False, null=False,
         max_length=FIELDLENGTH,
-        db_index=True,
         validators=[auv.validate_isprintable],
         verbose_name="Straße und Hausnummer / Street and number",
         help_text="Wohnadresse für diese Woche / This week's living address",
@@ -264,7 +309,6 @@ class Visit(djdm.Model):
         blank=False, null=False,
         max_length=FIELDLENGTH,
         verbose_name="Postleitzahl / Postal code",
-        db_index=True,
         validators=[djcv.RegexValidator(regex=r"^\d{5}$",  # noqa
                 message="5 Ziffern bitte / 5 digits, please", 
                 flags=re.ASCII)]
@@ -272,14 +316,12 @@ class Visit(djdm.Model):
     town = djdm.CharField(
         blank=False, null=False,
         max_length=FIELDLENGTH,
-        db_index=True,
         validators=[auv.validate_isprintable],
         verbose_name="Ort / Town",
     )
     phone = djdm.CharField(
         blank=False, null=False,
         max_length=FIELDLENGTH,
-        db_index=True,
         verbose_name="Mobilfunknummer / Mobile phone number",
         help_text="Mit Ländervorwahl, z.B. +49 151... in Deutschland / "
                   "With country code, starting with '+'",
@@ -291,7 +333,6 @@ class Visit(djdm.Model):
     email = djdm.EmailField(
         blank=True, null=False,
         max_length=FIELDLENGTH,
-        db_index=True,
         verbose_name="Emailadresse / Email address",
         help_text="Bitte immer die gleiche benutzen! / Please use the same one each time",
     )
@@ -319,12 +360,10 @@ class Visit(djdm.Model):
     present_from_dt = djdm.DateTimeField(
         blank=False, null=False,
         max_length=FIELDLENGTH,
-        db_index=True,
     )
     present_to_dt = djdm.DateTimeField(
         blank=False, null=False,
         max_length=FIELDLENGTH,
-        db_index=True,
     )
     submission_dt = djdm.DateTimeField(auto_now_add=True)
     cookie = djdm.TextField(blank=False, null=False, max_length=15,  # noqa
@@ -0,0 +1,85 @@
+"""
+In-memory organization->department->building->room tree of all Rooms.
+ShowRoomsView and QRcodesByRoomsView are served from it instead of
+grouping and counting the whole Room table on each request.
+The tree is loaded once per process and reloaded after an Importstep has
+completed (in any process, as told by a tiny query on Importstep)
+or after Rooms were saved or deleted in this process (see signals.py).
+"""
+import threading
+import typing as tg
+
+from django.db.models import F, Max, Sum
+
+import anwesende.room.models as arm
+
+Buildings = tg.Dict[str, tg.List[arm.Room]]  # building -> rooms
+Tree = tg.Dict[str, tg.Dict[str, Buildings]]  # organization -> department -> ...
+
+_lock = threading.Lock()
+_tree: tg.Optional[Tree] = None
+_stamp: tg.Any = None
+
+
+def invalidate() -> None:
+    global _tree
+    _tree = None
+
+
+def departments() -> tg.List[tg.Mapping[str, tg.Any]]:
+    return [dict(organization=org, department=dept, buildings=len(buildings))
+            for org, depts in get_tree().items()
+            for dept, buildings in depts.items()]
+
+
+def buildings(organization: str, department: str) -> tg.List[tg.Mapping[str, tg.Any]]:
+    return [dict(building=bldg, rooms=len(rooms))
+            for bldg, rooms in _buildings(organization, department).items()]
+
+
+def rooms(organization: str, department: str, building: str) -> tg.List[arm.Room]:
+    return _buildings(organization, department).get(building, [])
+
+
+def room_ids(organization: str, department: str, building: str,
+             room: str = "") -> tg.List[int]:
+    return [r.pk for r in rooms(organization, department, building)
+            if not room or r.room == room]
+
+
+def get_tree() -> Tree:
+    global _tree, _stamp
+    stamp = _importsteps_stamp()
+    tree = _tree
+    if tree is not None and stamp == _stamp:
+        return tree
+    with _lock:
+        tree = _load_tree()
+        _tree, _stamp = tree, stamp
+    return tree
+
+
+def _buildings(organization: str, department: str) -> Buildings:
+    return get_tree().get(organization, {}).get(department, {})
+
+
+def _importsteps_stamp() -> tg.Tuple[tg.Optional[int], tg.Optional[int]]:
+    # Importsteps are saved with their room counts only once they complete:
+    stamp = arm.Importstep.objects.aggregate(
+            last=Max('pk'),
+            rooms=Sum(F('num_new_rooms') + F('num_existing_rooms')))
+    return (stamp['last'], stamp['rooms'])
+
+
+def _load_tree() -> Tree:
+    tree: Tree = {}
+    allrooms = (arm.Room.objects
+            .only('organization', 'department', 'building', 'room',
+                  'row_dist', 'seat_dist', 'seat_last')
+            .order_by('organization', 'department', 'building', 'room'))
+    for room in allrooms:
+        (tree.setdefault(room.organization, {})
+             .setdefault(room.department, {})
+             .setdefault(room.building, [])
+             .append(room))
+    return tree
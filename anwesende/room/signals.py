@@ -0,0 +1,11 @@
+import django.db.models.signals as djdms
+from django.dispatch import receiver
+
+import anwesende.room.models as arm
+import anwesende.room.roomtree as arrt
+
+
+@receiver(djdms.post_save, sender=arm.Room)
+@receiver(djdms.post_delete, sender=arm.Room)
+def invalidate_roomtree(sender, **kwargs):
+    arrt.invalidate()
@@ -0,0 +1,140 @@
+#!/bin/env python
+"""
+A stand-alone benchmark (needs psycopg2 and a scratch PostgreSQL database,
+not Django) comparing the Visit indexes before migration 0014_visit_indexes
+(one per person field and per time field) with those after it
+(two composite indexes on the time fields).
+
+For each index set, it fills a copy of room_visit (table indexbench_visit) with
+single-row INSERTs in autocommit mode (like check-ins do) and reports
+the insert throughput, then the median latency of queries shaped like
+those of SearchView, Visit._overlapping_visits_qs, the weekly report,
+and coalesce_visits.
+All person searches use ILIKE, which no B-tree index can serve.
+"""
+import datetime as dt
+import random
+import statistics
+import string
+import sys
+import time
+import typing as tg
+
+import psycopg2
+
+usage_msg = """usage: python indexbench.py dsn numvisits
+  e.g. python indexbench.py "dbname=bench user=postgres host=localhost" 50000
+"""
+
+CREATE_TABLE = """
+CREATE TABLE indexbench_visit (
+    id serial PRIMARY KEY,
+    givenname varchar(80) NOT NULL, familyname varchar(80) NOT NULL,
+    street_and_number varchar(80) NOT NULL, zipcode varchar(80) NOT NULL,
+    town varchar(80) NOT NULL, phone varchar(80) NOT NULL,
+    email varchar(80) NOT NULL, status_3g integer NOT NULL,
+    present_from_dt timestamptz NOT NULL, present_to_dt timestamptz NOT NULL,
+    submission_dt timestamptz NOT NULL, cookie text NOT NULL, seat_id integer NOT NULL)
+"""
+COMMON_INDEXES = [
+    "CREATE INDEX ON indexbench_visit (seat_id)",
+    "CREATE UNIQUE INDEX ON indexbench_visit (cookie, seat_id, present_from_dt, present_to_dt) "
+    "WHERE NOT cookie IN ('', 'none')",
+]
+PERSON_FIELDS = ('givenname', 'familyname', 'street_and_number', 'zipcode',
+                 'town', 'phone', 'email')
+INDEXSETS = {
+    'before': (COMMON_INDEXES +
+               [f"CREATE INDEX ON indexbench_visit ({f})" for f in PERSON_FIELDS] +
+               [f"CREATE INDEX ON indexbench_visit ({f} varchar_pattern_ops)" for f in PERSON_FIELDS] +
+               ["CREATE INDEX ON indexbench_visit (present_from_dt)",
+                "CREATE INDEX ON indexbench_visit (present_to_dt)"]),
+    'after': (COMMON_INDEXES +
+              ["CREATE INDEX ON indexbench_visit (present_from_dt, present_to_dt)",
+               "CREATE INDEX ON indexbench_visit (present_to_dt, present_from_dt)"]),
+}
+INSERT = ("INSERT INTO indexbench_visit (givenname, familyname, street_and_number, zipcode, "
+          "town, phone, email, status_3g, present_from_dt, present_to_dt, "
+          "submission_dt, cookie, seat_id) "
+          "VALUES (%s, %s, %s, %s, %s, %s, %s, 1, %s, %s, now(), %s, %s)")
+NOW = dt.datetime.now(dt.timezone.utc)
+QUERIES = {  # name -> (sql, function making params)
+    'search': ("SELECT * FROM indexbench_visit WHERE familyname ILIKE %s AND phone ILIKE '%%' "
+               "AND present_to_dt > %s AND present_from_dt < %s",
+               lambda: (f"%{_word(2)}%", NOW - dt.timedelta(days=14), NOW)),
+    'overlapping': ("SELECT * FROM indexbench_visit WHERE seat_id < 20 "
+                    "AND present_from_dt <= %s AND present_to_dt >= %s",
+                    lambda: _window(dt.timedelta(minutes=15))),
+    'weekreport': ("SELECT count(*) FROM indexbench_visit "
+                   "WHERE present_from_dt >= %s AND present_from_dt <= %s",
+                   lambda: _week()),
+    'coalesce': ("SELECT * FROM indexbench_visit WHERE present_to_dt >= %s",
+                 lambda: (NOW - dt.timedelta(hours=48),)),
+}
+
+
+def run(dsn: str, indexset: str, numvisits: int, queryrepeats=50) -> None:
+    random.seed(42)  # same data for each index set
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS indexbench_visit")
+        cursor.execute(CREATE_TABLE)
+        for statement in INDEXSETS[indexset]:
+            cursor.execute(statement)
+        start = time.perf_counter()
+        for i in range(numvisits):
+            cursor.execute(INSERT, _visit(i))
+        seconds = time.perf_counter() - start
+        cursor.execute("VACUUM ANALYZE indexbench_visit")
+        cursor.execute("SELECT pg_size_pretty(pg_indexes_size('indexbench_visit'))")
+        indexsize = cursor.fetchone()[0]
+        print(f"{indexset:6s}: {len(INDEXSETS[indexset]) + 1:2d} indexes ({indexsize}), "
+              f"{numvisits / seconds:7.0f} inserts/s")
+        for name, (sql, make_params) in QUERIES.items():
+            times = []
+            for i in range(queryrepeats):
+                start = time.perf_counter()
+                cursor.execute(sql, make_params())
+                cursor.fetchall()
+                times.append(time.perf_counter() - start)
+            print(f"        {name:12s} {1000 * statistics.median(times):8.2f} ms median")
+        cursor.execute("DROP TABLE indexbench_visit")
+    conn.close()
+
+
+def _visit(i: int) -> tg.Tuple:
+    start = NOW - dt.timedelta(minutes=random.randrange(28 * 24 * 60))
+    end = start + dt.timedelta(minutes=random.randrange(30, 240))
+    return (_word(6).title(), _word(8).title(), f"{_word(10).title()} {i % 99}",
+            "%05d" % random.randrange(100000), _word(7).title(),
+            "+49 151 %07d" % random.randrange(10000000), f"{_word(8)}@example.org",
+            start, end, _word(15), random.randrange(2000))
+
+
+def _word(length: int) -> str:
+    return "".join(random.choice(string.ascii_lowercase) for i in range(length))
+
+
+def _window(minimum: dt.timedelta) -> tg.Tuple[dt.datetime, dt.datetime]:
+    from_ = NOW - dt.timedelta(minutes=random.randrange(28 * 24 * 60))
+    to_ = from_ + dt.timedelta(hours=2)
+    return (to_ - minimum, from_ + minimum)
+
+
+def _week() -> tg.Tuple[dt.datetime, dt.datetime]:
+    start = NOW - dt.timedelta(days=random.randrange(7, 28))
+    return (start, start + dt.timedelta(days=7))
+
+
+def main():
+    if len(sys.argv) != 3:
+        print(usage_msg)
+        sys.exit(1)
+    dsn, numvisits = sys.argv[1], int(sys.argv[2])
+    for indexset in INDEXSETS:
+        run(dsn, indexset, numvisits)
+
+
+if __name__ == '__main__':
+    main()
@@ -152,8 +152,8 @@ def setup_app(base_url: str) -> wt.TestApp:
 def _get_dummyseat_url(base_url: str) -> str:
     app = setup_app(base_url)
     homepage_html = app.get("/").text
-    # contains e.g.:  (<a href="/Sc2178e95a1">Beispiel<sup>*</sup></a>)
-    regexp = r'<a href="(/S[0-9a-f]{5,15})">Beispiel'
+    # contains e.g.:  (<a href="/S/c2178e95a1">Beispiel<sup>*</sup></a>)
+    regexp = r'<a href="(/S/[0-9a-f]{5,15})">Beispiel'
     mm = re.search(regexp, homepage_html)
     assert mm, f"dummyseat URL '{regexp}' not found"
     return mm.group(1)
@@ -0,0 +1,51 @@
+import django.core.exceptions as djce
+import django.test as djt
+import pytest
+
+import anwesende.room.checkin as arci
+import anwesende.room.models as arm
+import anwesende.room.tests.makedata as artmd
+import anwesende.utils.cache as aucache
+import anwesende.utils.date as aud
+
+prefill = dict(givenname="A.", familyname="Fam", street_and_number="Str. 1",
+               zipcode="12345", town="Town", phone="+49 1234 1",
+               email="a@fam.de", status_3g=str(arm.G_IMPFT), cookie="abcdefghij")
+
+
+@djt.utils.override_settings(USE_EMAIL_FIELD=True, USE_STATUS_3G_FIELD=True)
+def test_is_complete():
+    assert arci.is_complete(prefill)
+    assert not arci.is_complete(None)
+    assert not arci.is_complete(dict(prefill, email=""))
+    assert not arci.is_complete(dict(prefill, zipcode="1234"))
+    assert not arci.is_complete(dict(prefill, status_3g=str(arm.G_TESTET)))
+    with djt.utils.override_settings(USE_EMAIL_FIELD=False, USE_STATUS_3G_FIELD=False):
+        assert arci.is_complete(dict(prefill, email="", status_3g=""))
+
+
+@pytest.mark.django_db
+def test_make_visit(django_assert_num_queries):
+    seat, = artmd.make_seats("room1", 1)
+    assert arci.seat_id_by_hash("nosuchhash") is None
+    assert arci.seat_id_by_hash(seat.hash) == seat.pk
+    from_, to_ = aud.make_dt('now', "11:00"), aud.make_dt('now', "12:00")
+    with django_assert_num_queries(1):
+        seat_id = arci.seat_id_by_hash(seat.hash)  # cached
+        assert seat_id is not None
+        arci.make_visit(prefill, seat_id, from_, to_).save()
+    assert arm.Visit.objects.get().seat == seat
+    with pytest.raises(djce.ValidationError):
+        arci.make_visit(prefill, seat.pk, to_, from_)
+
+
+@pytest.mark.django_db
+def test_store_suppresses_repeats():
+    seat, = artmd.make_seats("room1", 1)
+    from_, to_ = aud.make_dt('now', "11:00"), aud.make_dt('now', "12:00")
+    assert arci.store(arci.make_visit(prefill, seat.pk, from_, to_))
+    assert not arci.store(arci.make_visit(prefill, seat.pk, from_, to_))  # cache
+    aucache.local().clear()
+    assert not arci.store(arci.make_visit(prefill, seat.pk, from_, to_))  # constraint
+    assert arci.store(arci.make_visit(prefill, seat.pk, from_, aud.make_dt('now', "12:30")))
+    assert arm.Visit.objects.count() == 2
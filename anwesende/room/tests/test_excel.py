@@ -1,7 +1,9 @@
 import re
+import threading
 import typing as tg
 
 from django.conf import settings
+import django.db as djdb
 import pytest
 
 import anwesende.room.excel as are
@@ -142,6 +144,40 @@ def test_create_seats_from_excel():
     assert re.fullmatch(r"[0-9a-f]{10}", myseat2.hash)
 
 
+@pytest.mark.django_db
+def test_create_seats_from_excel_again(monkeypatch):
+    monkeypatch.setattr(are, 'SEATS_PER_INSERT', 3)  # several batches
+    user = aum.User.objects.create(name="x")
+    step1 = are.create_seats_from_excel(excel_rooms1_filename, user)
+    arm.Seat.objects.filter(rownumber=2).delete()
+    step2 = are.create_seats_from_excel(excel_rooms1_filename, user)
+    assert (step1.num_new_seats, step1.num_existing_seats) == (20, 0)
+    assert (step2.num_new_seats, step2.num_existing_seats) == (10, 10)
+    assert arm.Seat.objects.count() == 20
+
+
+@pytest.mark.django_db(transaction=True)
+def test_lock_department():
+    def try_lock(department: str, results: tg.List[bool]):
+        try:
+            with djdb.transaction.atomic(), djdb.connection.cursor() as cursor:
+                cursor.execute("SELECT pg_try_advisory_xact_lock(%s, %s)",
+                               [are.IMPORT_LOCK_CLASS, are._department_key("org", department)])
+                results.append(cursor.fetchone()[0])
+        finally:
+            djdb.connection.close()
+
+    results: tg.List[bool] = []
+    with djdb.transaction.atomic():
+        are._lock_department("org", "dept1")
+        for department in ("dept1", "dept2"):
+            thread = threading.Thread(target=try_lock, args=(department, results))
+            thread.start()
+            thread.join()
+    try_lock("dept1", results)  # released at the end of the transaction
+    assert results == [False, True, True]  # only the same department must wait
+
+
 @pytest.mark.django_db
 def test_collect_visitgroups():
     artm.make_user_rooms_seats_visits("r2s2", visitsN=4)
@@ -2,6 +2,8 @@ import datetime as dt
 import re
 import typing as tg
 
+import django.test as djt
+import openpyxl
 import pytest
 
 import anwesende.room.excel as are
@@ -14,6 +16,18 @@ import anwesende.users.models as aum
 excel_rooms1_filename = "anwesende/room/tests/data/rooms1.xlsx"
 excel_rooms2_filename = "anwesende/room/tests/data/rooms2.xlsx"
 
+
+def make_two_department_file(dirpath) -> str:
+    """rooms1.xlsx with its second room (K40) in department 'Physik'."""
+    workbook = openpyxl.load_workbook(excel_rooms1_filename)
+    sheet = workbook.active
+    headers = [cell.value for cell in sheet[1]]
+    sheet.cell(row=3, column=headers.index('department') + 1, value="Physik")
+    filename = str(dirpath / "rooms-2depts.xlsx")
+    workbook.save(filename)
+    return filename
+
+
 @pytest.mark.django_db
 def test_displayable_importsteps():
     user = aum.User.objects.create(username="user1")
@@ -36,8 +50,8 @@ def test_displayable_importsteps():
     assert step1.num_existing_seats == 0
     assert step1.num_new_rooms == 2
     assert step1.num_new_seats == 20
-    assert step1.num_qrcodes == 20  # type: ignore[attr-defined]
-    assert step1.num_qrcodes_moved == 0  # type: ignore[attr-defined]
+    assert step1.num_qrcodes == 20
+    assert step1.num_qrcodes_moved == 0
     # ----- create importstep2:
     stuff2 = are.create_seats_from_excel(excel_rooms2_filename, user)
     print(stuff2)
@@ -60,13 +74,39 @@ def test_displayable_importsteps():
     step1b = steps2[0]  # order is oldest first
     assert step1b.num_new_seats == 20
     # first room is untouched, second room was updated:
-    assert step1b.num_qrcodes == 14  # type: ignore[attr-defined]
-    assert step1b.num_qrcodes_moved == 6  # type: ignore[attr-defined]
+    assert step1b.num_qrcodes == 14
+    assert step1b.num_qrcodes_moved == 6
     # ----- check displayable importstep2:
     step2 = steps2[1]
     assert step2.num_existing_rooms == 1
     assert step2.num_existing_seats == 6
     assert step2.num_new_rooms == 0
     assert step2.num_new_seats == 2
-    assert step2.num_qrcodes == 8  # type: ignore[attr-defined]
-    assert step2.num_qrcodes_moved == 0  # type: ignore[attr-defined]
\ No newline at end of file
+    assert step2.num_qrcodes == 8
+    assert step2.num_qrcodes_moved == 0
+
+
+@pytest.mark.django_db(transaction=True)
+@djt.utils.override_settings(IMPORT_WORKERS=2)
+def test_create_seats_from_excel_by_department(tmp_path):
+    user = aum.User.objects.create(username="user1")
+    filename = make_two_department_file(tmp_path)
+    with pytest.raises(are.InvalidExcelError):
+        are.create_seats_from_excel(filename, user)  # single-department mode
+    results = are.create_seats_from_excel_by_department(filename, user)
+    assert [(org, dept) for org, dept, step in results] == [
+            ("fu-berlin.de", "MathInf"), ("fu-berlin.de", "Physik")]
+    pks = [step.pk for o, d, step in results if isinstance(step, arm.Importstep)]
+    assert len(pks) == 2  # no exceptions
+    steps = arm.Importstep.objects.filter(pk__in=pks)
+    assert sorted((s.department, s.num_new_rooms, s.num_new_seats, s.num_qrcodes)
+                  for s in steps) == [("MathInf", 1, 14, 14), ("Physik", 1, 6, 6)]
+
+
+@djt.utils.override_settings(IMPORT_WORKERS=4, ADMISSION_SLOTS=3)
+def test_import_workers(monkeypatch, settings):
+    assert are.import_workers() == 4  # no pool
+    monkeypatch.setitem(settings.DATABASES['default'], 'POOL', dict(SIZE=5))
+    assert are.import_workers() == 2
+    monkeypatch.setitem(settings.DATABASES['default'], 'POOL', dict(SIZE=3))
+    assert are.import_workers() == 0  # import in the request thread
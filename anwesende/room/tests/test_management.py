@@ -1,10 +1,17 @@
+import io
+import typing as tg
+
 import django.contrib.auth.models as djcam
+import django.core.management as djcmgmt
 import pytest
 
+import anwesende.room.management.commands.coalesce_visits as coalesce_visits
 import anwesende.room.management.commands.delete_outdated_data as delete_outdated_data
 import anwesende.room.management.commands.make_base_data as make_base_data
+import anwesende.room.excel as are
 import anwesende.room.models as arm
 import anwesende.room.tests.makedata as artm
+import anwesende.utils.date as aud
 
 
 @pytest.mark.django_db
@@ -46,3 +53,70 @@ def test_delete_outdated_data(freezer, caplog):
     assert "(of 120 existing)" in msg[0]
     assert "cleansing 2 " in msg[1]
     assert "(of 70 existing)" in msg[1]
+
+
+@pytest.mark.django_db
+def test_coalesce_visits(freezer):
+    freezer.move_to("2021-11-01T18:00")
+    seat1, seat2 = artm.make_seats("room1", 2)
+    person = dict(givenname="A.", familyname="Fam", street_and_number="Str. 1",
+                  zipcode="12345", town="Town", phone="+49 1234 1",
+                  email="a@fam.de", cookie="abcdefghij")
+
+    def visit(from_, to_, seat=seat1, **kwargs):
+        arm.Visit.objects.create(seat=seat, **dict(person, **kwargs),
+                                 present_from_dt=aud.make_dt('now', from_),
+                                 present_to_dt=aud.make_dt('now', to_))
+    visit("10:00", "12:00")
+    visit("10:00", "11:00")  # included in the first
+    visit("10:30", "11:00")  # included in the first
+    visit("11:30", "12:30")  # overlaps the first: kept
+    visit("12:30", "13:00")  # touches the previous one: kept
+    visit("14:00", "15:00")
+    visit("15:00", "16:00")  # touches the previous one: kept
+    visit("10:30", "12:30", cookie="otherother")  # other person
+    visit("10:30", "12:30", seat=seat2)  # other seat
+    visit("14:50", "15:10", seat=seat2, givenname="B.", cookie="bbbbbbbbbb")
+    contacts_before = _contacts()
+    coalesce_visits.Command().handle()
+    assert arm.Visit.objects.count() == 8
+    times = [(aud.dtstring(v.present_from_dt, date=False, time=True),
+              aud.dtstring(v.present_to_dt, date=False, time=True))
+             for v in arm.Visit.objects.filter(seat=seat1, cookie="abcdefghij")
+                                       .order_by('present_from_dt')]
+    assert times == [("10:00", "12:00"), ("11:30", "12:30"), ("12:30", "13:00"),
+                     ("14:00", "15:00"), ("15:00", "16:00")]
+    contacts_after = _contacts()
+    assert contacts_after == {pk: contacts for pk, contacts in contacts_before.items()
+                              if pk in contacts_after}
+    assert contacts_after['B.'] == {"B."}  # A. overlapped B. with no single visit
+    coalesce_visits.Command().handle()  # must be idempotent
+    assert arm.Visit.objects.count() == 8
+
+
+def _contacts() -> tg.Dict[tg.Union[int, str], tg.Set[str]]:
+    """Names overlapping each visit, and those in each person's visitgroups."""
+    result: tg.Dict[tg.Union[int, str], tg.Set[str]] = {
+            visit.pk: {v.givenname for v in visit.get_overlapping_visits()}
+            for visit in arm.Visit.objects.all()}
+    for name in ("A.", "B."):
+        result[name] = {v.givenname for v in are.collect_visitgroups(
+                arm.Visit.objects.filter(givenname=name)) if v}
+    return result
+
+
+@pytest.mark.django_db
+def test_query_doctor():
+    out = io.StringIO()
+    djcmgmt.call_command('query_doctor', stdout=out)
+    assert "no visits" in out.getvalue()
+    artm.make_user_rooms_seats_visits(seat_last="r1s3", visitsN=4)
+    out = io.StringIO()
+    djcmgmt.call_command('query_doctor', stdout=out)
+    report = out.getvalue()
+    for name in ("Visit.get_overlapping_visits", "SearchView.get_queryset",
+                 "reports.visitors_by_week_report", "Importstep.displayable_importsteps"):
+        assert f"\n{name}: " in report
+    assert "Execution Time" in report
+    assert "scans: " in report
+    assert "room_visit: " in report
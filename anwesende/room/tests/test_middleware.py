@@ -0,0 +1,92 @@
+import typing as tg
+
+import django.core.exceptions as djce
+import django.db as djdb
+import django.http as djh
+import django.test as djt
+import django.urls as dju
+import pytest
+
+import anwesende.room.middleware as armw
+import anwesende.room.models as arm
+import anwesende.room.tests.makedata as artm
+
+
+def _request(rf: djt.RequestFactory, path: str, data=None) -> tg.Any:
+    """A GET request as the middleware sees it (with attributes Django does not declare)."""
+    request: tg.Any = rf.get(path, data)
+    request.resolver_match = dju.resolve(path)
+    request.admission_slots = []
+    return request
+
+
+@djt.utils.override_settings(ADMISSION_CONTROL=True, ADMISSION_SLOTS=2,
+                             ADMISSION_HEAVY_SLOTS=1, ADMISSION_HEAVY_WAIT_SECONDS=0.01,
+                             ADMISSION_CHECKIN_WAIT_SECONDS=0.01)
+def test_admission_control(rf):
+    mw = armw.AdmissionControlMiddleware(lambda request: djh.HttpResponse("ok"))
+    search = _request(rf, dju.reverse('room:search'))
+    search2 = _request(rf, dju.reverse('room:search'))
+    visit = _request(rf, dju.reverse('room:visit', kwargs=dict(hash="abc")))
+    visit2 = _request(rf, dju.reverse('room:visit', kwargs=dict(hash="abc")))
+    home = _request(rf, dju.reverse('room:home'))
+    assert mw.process_view(search, None, (), {}) is None  # heavy slot taken
+    resp = mw.process_view(search2, None, (), {})  # no second heavy slot
+    assert resp is not None and resp.status_code == 503 and resp['Retry-After']
+    assert mw.process_view(visit, None, (), {}) is None  # reserved for check-ins
+    resp = mw.process_view(visit2, None, (), {})  # all slots are busy now
+    assert resp is not None and resp.status_code == 503
+    assert mw.process_view(home, None, (), {}) is None  # not controlled
+    for request in (search, visit):  # as done at the end of __call__
+        for slot in request.admission_slots:
+            slot.release()
+    assert mw.process_view(visit2, None, (), {}) is None
+
+
+@djt.utils.override_settings(ADMISSION_CONTROL=False)
+def test_admission_control_off():
+    with pytest.raises(djce.MiddlewareNotUsed):
+        armw.AdmissionControlMiddleware(lambda request: djh.HttpResponse("ok"))
+
+
+@pytest.mark.django_db
+def test_profiling(rf, tmp_path, user):
+    with djt.utils.override_settings(PROFILE_DIR=str(tmp_path)):
+        mw = armw.ProfilingMiddleware(lambda request: djh.HttpResponse(
+                str(arm.Room.objects.count())))
+    datenverwalter = artm.make_datenverwalter_user()
+    request = _request(rf, dju.reverse('room:faq'))
+    request.user = datenverwalter
+    assert 'X-Anwesende-Profile' not in mw(request)  # not requested
+    request = _request(rf, dju.reverse('room:faq'), dict(profile="1"))
+    request.user = user
+    assert 'X-Anwesende-Profile' not in mw(request)  # not a Datenverwalter
+    request.user = datenverwalter
+    with djt.utils.override_settings(PROFILE_DIR=str(tmp_path)):
+        basename = mw(request)['X-Anwesende-Profile']
+    summary = (tmp_path / f"{basename}.txt").read_text()
+    assert "1 SQL statements" in summary
+    assert 'FROM "room_room"' in summary
+    assert (tmp_path / f"{basename}.prof").exists()
+
+
+@pytest.mark.django_db
+def test_slow_query_capture(rf, monkeypatch):
+    captured = []
+    monkeypatch.setattr(armw.auslow, 'capture',
+                        lambda *args: captured.append(args))
+
+    def view(request):
+        with djdb.connection.cursor() as cursor:
+            cursor.execute("SELECT pg_sleep(0.02)")
+        return djh.HttpResponse("ok")
+
+    with djt.utils.override_settings(SLOW_QUERY_MS=0):
+        with pytest.raises(djce.MiddlewareNotUsed):
+            armw.SlowQueryMiddleware(view)
+    with djt.utils.override_settings(SLOW_QUERY_MS=10):
+        mw = armw.SlowQueryMiddleware(view)
+        mw(_request(rf, dju.reverse('room:search')))
+    (viewname, alias, sql, params, seconds), = captured
+    assert (viewname, alias, sql) == ('room:search', 'default', "SELECT pg_sleep(0.02)")
+    assert seconds >= 0.02
@@ -1,4 +1,5 @@
 # see https://github.com/wemake-services/django-test-migrations
+import datetime as dt
 import typing as tg
 
 import django_test_migrations.migrator as dtmm
@@ -32,3 +33,74 @@ def test_room_descriptor_DATA_migration(migrator: dtmm.Migrator):
     Room = new_state.apps.get_model('room', 'Room')
     newroom = Room.objects.get()
     assert newroom.descriptor == "myorg;mydep;mybldg;myroom"
+
+
+@pytest.mark.django_db
+def test_importstep_counts_DATA_migration(migrator: dtmm.Migrator):
+    #--- create migration state before introducing Importstep.num_qrcodes:
+    old_state = migrator.apply_initial_migration(('room', '0015_seat_unique_position'))
+    User = old_state.apps.get_model('users', 'User')
+    user = User.objects.create(name="x")
+    Importstep = old_state.apps.get_model('room', 'Importstep')
+    step1 = Importstep.objects.create(user=user, num_new_rooms=1, num_new_seats=3)
+    step2 = Importstep.objects.create(user=user)  # its room has moved on
+    Room = old_state.apps.get_model('room', 'Room')
+    room = Room.objects.create(
+            organization="myorg", department="mydep", 
+            building="mybldg", room="myroom", descriptor="myorg;mydep;mybldg;myroom",
+            row_dist=1.3, seat_dist=0.8, seat_last="r1s3", importstep=step1)
+    Seat = old_state.apps.get_model('room', 'Seat')
+    for seatnumber in (1, 2, 3):
+        Seat.objects.create(room=room, rownumber=1, seatnumber=seatnumber,
+                            hash=f"hash{seatnumber}")
+
+    #--- migrate:
+    new_state = migrator.apply_tested_migration([
+            ('room', '0016_importstep_counts'),
+            ('room', '0017_importstep_counts_DATA'), ])
+
+    #--- assert counts are filled correctly:
+    Importstep = new_state.apps.get_model('room', 'Importstep')
+    new1, new2 = Importstep.objects.get(pk=step1.pk), Importstep.objects.get(pk=step2.pk)
+    assert (new1.organization, new1.department, new1.num_qrcodes) == ("myorg", "mydep", 3)
+    assert (new2.organization, new2.department, new2.num_qrcodes) == ("", "", 0)
+
+
+@pytest.mark.django_db
+def test_visit_repeated_submissions_DATA_migration(migrator: dtmm.Migrator):
+    #--- create migration state before introducing visit_unique_submission:
+    old_state = migrator.apply_initial_migration(('room', '0012_room_descriptor_DATA'))
+    User = old_state.apps.get_model('users', 'User')
+    user = User.objects.create(name="x")
+    Importstep = old_state.apps.get_model('room', 'Importstep')
+    Room = old_state.apps.get_model('room', 'Room')
+    room = Room.objects.create(
+            organization="myorg", department="mydep", 
+            building="mybldg", room="myroom", descriptor="myorg;mydep;mybldg;myroom",
+            row_dist=1.3, seat_dist=0.8, seat_last="r1s1",
+            importstep=Importstep.objects.create(user=user))
+    Seat = old_state.apps.get_model('room', 'Seat')
+    seat = Seat.objects.create(room=room, rownumber=1, seatnumber=1, hash="hash1")
+    Visit = old_state.apps.get_model('room', 'Visit')
+    from_ = dt.datetime(2021, 10, 1, 10, tzinfo=dt.timezone.utc)
+    to_ = from_ + dt.timedelta(hours=2)
+
+    def visit(cookie: str, present_to_dt: dt.datetime):
+        return Visit.objects.create(
+                givenname="A.", familyname="Fam", street_and_number="Str. 1",
+                zipcode="12345", town="Town", phone="+49 1", email="a@fam.de",
+                cookie=cookie, seat=seat, present_from_dt=from_, present_to_dt=present_to_dt)
+    first = visit("c1", to_)
+    visit("c1", to_)  # repeated submission
+    other = visit("c1", to_ + dt.timedelta(hours=1))
+    nocookies = [visit("none", to_), visit("none", to_)]
+
+    #--- migrate:
+    new_state = migrator.apply_tested_migration([
+            ('room', '0013_visit_repeated_submissions_DATA'),
+            ('room', '0013_visit_unique_submission'), ])
+
+    #--- assert only the repetition is gone:
+    Visit = new_state.apps.get_model('room', 'Visit')
+    assert sorted(Visit.objects.values_list('pk', flat=True)) == sorted(
+            [first.pk, other.pk] + [v.pk for v in nocookies])
@@ -0,0 +1,34 @@
+import pytest
+
+import anwesende.room.models as arm
+import anwesende.room.roomtree as arrt
+import anwesende.room.tests.makedata as artmd
+
+
+@pytest.mark.django_db
+def test_roomtree(django_assert_num_queries):
+    artmd.make_seats("room1", 2, "org1", "dep1")
+    artmd.make_seats("room2", 1, "org1", "dep1")
+    artmd.make_seats("room3", 1, "org2", "dep2")
+    #----- check the three levels:
+    assert arrt.departments() == [
+        dict(organization="org1", department="dep1", buildings=1),
+        dict(organization="org2", department="dep2", buildings=1)]
+    assert arrt.buildings("org1", "dep1") == [dict(building="bldg", rooms=2)]
+    assert [r.room for r in arrt.rooms("org1", "dep1", "bldg")] == ["room1", "room2"]
+    assert arrt.rooms("org1", "nodep", "bldg") == []
+    room2 = arm.Room.objects.get(room="room2")
+    assert arrt.room_ids("org1", "dep1", "bldg", "room2") == [room2.pk]
+    #----- the tree is reused while no Importstep completes:
+    with django_assert_num_queries(1):  # only the Importstep stamp
+        arrt.departments()
+    #----- new rooms invalidate the tree:
+    artmd.make_seats("room4", 1, "org1", "dep3")
+    assert len(arrt.departments()) == 3
+    #----- completed Importsteps (in whatever process) invalidate the tree:
+    arm.Room.objects.filter(room="room4").update(department="dep1")  # no signal
+    importstep = arm.Importstep.objects.get()
+    importstep.num_new_rooms += 1
+    importstep.save()
+    assert len(arrt.departments()) == 2
+    assert arrt.buildings("org1", "dep1") == [dict(building="bldg", rooms=3)]
@@ -9,12 +9,12 @@ import anwesende.room.utils as aru
 def test_escape_slash():
     # We use URLs containing path elements containing non-ASCII characters and '/'.
     # The former are handled by Django, but '/' is left as is. See here:
-    assert dju.reverse('room:visit', args=['a b']) == "/Sa%20b"
-    assert dju.reverse('room:visit', args=['a%b']) == "/Sa%25b"
-    assert dju.reverse('room:visit', args=['Ä']) == "/S%C3%84"
-    assert dju.reverse('room:visit', args=['a%20b']) == "/Sa%2520b"
+    assert dju.reverse('room:visit', args=['a b']) == "/S/a%20b"
+    assert dju.reverse('room:visit', args=['a%b']) == "/S/a%25b"
+    assert dju.reverse('room:visit', args=['Ä']) == "/S/%C3%84"
+    assert dju.reverse('room:visit', args=['a%20b']) == "/S/a%2520b"
     with pytest.raises(dju.exceptions.NoReverseMatch):
-        assert dju.reverse('room:visit', args=['a/b']) == "/Sa%2fb"
+        assert dju.reverse('room:visit', args=['a/b']) == "/S/a%2fb"
         # not found: It has two path elements, not just one
 
     # Our approach is to replace slashes in such URL parts with a slash-like
@@ -5,14 +5,21 @@ import typing as tg
 
 import bs4
 from django.conf import settings
+import django.db as djdb
+import django.test as djt
 import django.utils.timezone as djut
 import pytest
+import vanilla as vv
 import webtest as wt
 from django.urls import reverse
 from freezegun import freeze_time
 
 import anwesende.room.models as arm
+import anwesende.room.views as arv
+import anwesende.room.visitcookie as arvc
 import anwesende.room.tests.makedata as artm
+import anwesende.room.tests.test_import as artti
+import anwesende.utils.cache as aucache
 import anwesende.utils.date as aud
 import anwesende.utils.excel as aue
 
@@ -26,3 +33,160 @@ def test_import_POST_nologin(django_app: wt.TestApp):
     form1['file'] = wt.Upload(excelfile)
     resp = form1.submit().follow()  # POST requires login: must redirect
     assert resp.request.path == reverse('account_login')
+
+
+@pytest.mark.django_db
+@djt.utils.override_settings(IMPORT_WORKERS=1)  # threads would not see the test's data
+def test_import_multi_department(django_app: wt.TestApp, tmp_path):
+    datenverwalter = artm.make_datenverwalter_user()
+    importpage = django_app.get(reverse('room:import'), user=datenverwalter.username)
+    form = importpage.forms['UploadForm']
+    form['file'] = wt.Upload(artti.make_two_department_file(tmp_path))
+    form['multi_department'] = True
+    summary = form.submit().follow()
+    assert summary.request.path == reverse('room:import-summary')
+    rows = [[td.text for td in tr.find_all('td')] for tr in summary.html.tbody.find_all('tr')]
+    assert [row[:3] for row in rows[:2]] == [
+            ["fu-berlin.de", "MathInf", "1/14"], ["fu-berlin.de", "Physik", "1/6"]]
+    assert "20" in summary.html.tbody.find_all('tr')[-1].text  # totals
+    django_app.reset()
+    django_app.get(summary.request.url, status=302)  # login required
+
+
+@pytest.mark.django_db
+def test_qrcodes_paging(django_app: wt.TestApp, django_assert_max_num_queries):
+    datenverwalter = artm.make_datenverwalter_user()
+    seats = artm.make_seats("bigroom", 250)
+    url = reverse('room:qrcodes-byimport', kwargs=dict(pk=seats[0].room.importstep.pk))
+    with django_assert_max_num_queries(20):  # not one per seat
+        page1 = django_app.get(url, user=datenverwalter.username)
+    qrcodes1 = page1.html.find_all(name='img', class_='qrcode')
+    assert len(qrcodes1) == 200
+    assert seats[0].hash in qrcodes1[0]['src']  # ordered by seatnumber
+    page2 = page1.click(linkid=None, href=r"\?page=2", index=0)
+    qrcodes2 = page2.html.find_all(name='img', class_='qrcode')
+    assert len(qrcodes2) == 50
+    assert seats[-1].hash in qrcodes2[-1]['src']
+
+
+@pytest.mark.django_db
+@djt.utils.override_settings(VISIT_RENDER_THANKYOU=True)
+def test_visit_renders_thankyou(django_app: wt.TestApp):
+    seat, = artm.make_seats("room1", 1)
+    visit_page = django_app.get(reverse('room:visit', kwargs=dict(hash=seat.hash)))
+    form = visit_page.forms['VisitForm']
+    data = dict(givenname="A.", familyname="Fam", street_and_number="Str.1",
+                zipcode="12345", town="Town", phone="+49 1234 1", email="a@fam.de",
+                status_3g=str(arm.G_IMPFT), present_from_dt="11:00", present_to_dt="12:00")
+    for key, value in data.items():
+        if key in form.fields:
+            form[key] = value
+    resp = form.submit()
+    assert resp.status_code == 200  # no redirect
+    assert "Thank you for registering" in resp.text
+    assert arm.Visit.objects.count() == 1
+    resp = form.submit()  # like a reload of the thank-you page
+    assert "Thank you for registering" in resp.text
+    assert arm.Visit.objects.count() == 1  # resubmission was ignored
+
+
+@pytest.mark.django_db
+@djt.utils.override_settings(VISIT_RENDER_THANKYOU=True)
+def test_visit_renders_thankyou_stores_corrections(django_app: wt.TestApp):
+    seat, = artm.make_seats("room1", 1)
+    url = reverse('room:visit', kwargs=dict(hash=seat.hash))
+    data = dict(givenname="A.", familyname="Fam", street_and_number="Str.1",
+                zipcode="12345", town="Town", phone="+49 1234 1", email="a@fam.de",
+                status_3g=str(arm.G_IMPFT), present_from_dt="11:00", present_to_dt="12:00")
+    form = django_app.get(url).forms['VisitForm']
+    for key, value in data.items():
+        if key in form.fields:
+            form[key] = value
+    form.submit()
+    visit_page = django_app.get(url)  # now with a complete cookie
+    form.set('phone', "+49 1234 2")  # back, correct, submit again
+    form.set('present_to_dt', "12:30")
+    assert "Thank you for registering" in form.submit().text
+    assert arm.Visit.objects.filter(phone="+49 1234 2").count() == 1
+    form = visit_page.forms['VisitForm']
+    form['present_from_dt'], form['present_to_dt'] = "12:30", "13:00"
+    form.submit()
+    quickform = visit_page.forms['QuickVisitForm']  # after the main form of the same page
+    quickform['present_from_dt'], quickform['present_to_dt'] = "13:00", "14:00"
+    assert "Thank you for registering" in quickform.submit().text
+    assert arm.Visit.objects.count() == 4
+    quickform.submit()  # a reload of the thank-you page
+    assert arm.Visit.objects.count() == 4
+
+
+@pytest.mark.django_db
+def test_visit_cookie_path(django_app: wt.TestApp):
+    seat, = artm.make_seats("room1", 1)
+    url = reverse('room:visit', kwargs=dict(hash=seat.hash))
+    assert django_app.get(f"/S{seat.hash}", status=308).location.endswith(url)
+    prefill = dict(givenname="A.", familyname="Fam", street_and_number="Str.1",
+                   zipcode="12345", town="Town", phone="+49 1234 1", email="a@fam.de",
+                   status_3g=str(arm.G_IMPFT), cookie="abcdefghij")
+    django_app.set_cookie(arvc.OLD_COOKIENAME, arvc.encode(prefill))
+    form = django_app.get(url).forms['VisitForm']
+    assert form['givenname'].value == "A."  # old cookie still read
+    form['present_from_dt'], form['present_to_dt'] = "00:00", "23:59"
+    setcookies = [c.strip() for c in form.submit().headers.getall('Set-Cookie')]
+    assert any(c.startswith(f"{arvc.COOKIENAME}=") and "Path=/S/" in c for c in setcookies)
+    assert any(c.startswith(f"{arvc.OLD_COOKIENAME}=\"\"") for c in setcookies)
+
+
+@pytest.mark.django_db
+def test_visit_seat_from_cache(django_app: wt.TestApp):
+    seat, = artm.make_seats("room1", 1)
+    url = reverse('room:visit', kwargs=dict(hash=seat.hash))
+    django_app.get(url)
+    assert aucache.shared().get(f"seat_id:{seat.hash}") == seat.pk
+    django_app.get(reverse('room:visit', kwargs=dict(hash="nosuchhash")), status=404)
+    seat.delete()  # the cached id must not break anything
+    django_app.get(url, status=404)
+
+
+class _SleepView(arv.QueryDeadline, vv.TemplateView):
+    template_name = "room/faq.html"
+    query_deadline_ms = 50
+
+    def get_context_data(self, **kwargs):
+        with djdb.connection.cursor() as cursor:
+            cursor.execute("SELECT pg_sleep(%s)", [float(self.kwargs['seconds'])])
+            if self.kwargs.get('write'):
+                cursor.execute("CREATE TEMPORARY TABLE t (i int)")
+        return dict(settings=settings)
+
+
+@pytest.mark.django_db
+def test_query_deadline(rf):
+    request = rf.get("/")
+    resp = _SleepView.as_view()(request, seconds=0.01)
+    assert "Suche dauert zu lange" not in resp.rendered_content
+    resp = _SleepView.as_view()(request, seconds=1.0)
+    assert "Suche dauert zu lange" in resp.content.decode()
+    assert arm.Room.objects.count() == 0  # connection still usable
+
+
+@pytest.mark.django_db(transaction=True)
+def test_query_deadline_read_only(rf):
+    with pytest.raises(djdb.InternalError):  # read-only transaction
+        _SleepView.as_view()(rf.get("/"), seconds=0, write=True)
+
+
+def test_autocommit_views():
+    for view in (arv.VisitView, arv.QuickVisitView, arv.ThankyouView, arv.HomeView,
+                 arv.SearchView, arv.VisitorsByWeekView):
+        assert view.as_view()._non_atomic_requests  # exempt from ATOMIC_REQUESTS
+
+
+@pytest.mark.django_db
+def test_metrics(django_app: wt.TestApp, user):
+    datenverwalter = artm.make_datenverwalter_user()
+    django_app.get(reverse('room:faq'))
+    resp = django_app.get(reverse('room:metrics'), user=datenverwalter.username)
+    assert resp.content_type == "text/plain"
+    assert 'anwesende_request_seconds_count{view="room:faq"}' in resp.text
+    assert 'anwesende_db_queries_total{view="room:faq"}' in resp.text
+    django_app.get(reverse('room:metrics'), user=user.username, status=403)
@@ -0,0 +1,33 @@
+import json
+
+import anwesende.room.visitcookie as arvc
+
+prefill = dict(givenname="Jörg", familyname="Fam", street_and_number="Str. 1",
+               zipcode="12345", town="Town", phone="+49 1234 1",
+               email="a@fam.de", status_3g="22", cookie="abcdefghij")
+
+
+def test_encode_decode():
+    value = arvc.encode(dict(prefill, present_from_dt="11:00", status_3g=22))
+    assert value
+    assert len(value) < 200
+    assert "{" not in value and "Fam" not in value  # no JSON, not plain text
+    assert arvc.decode(value) == prefill
+    empty = arvc.decode(arvc.encode(dict()))  # type: ignore[arg-type]
+    assert empty == {field: "" for field in arvc.FIELDS}
+
+
+def test_decode_rejects_bad_values():
+    value = arvc.encode(prefill)
+    assert value
+    assert arvc.decode(value[:-1]) is None  # broken signature
+    assert arvc.decode("x" + value) is None  # tampered
+    assert arvc.decode("") is None
+    assert arvc.decode("{broken json") is None
+    assert arvc.decode(value + "x" * arvc.MAXLENGTH) is None  # too long
+    assert arvc.encode(dict(prefill, town="x" * arvc.MAXLENGTH)) is None
+
+
+def test_decode_version1():
+    oldcookie = json.dumps(dict(prefill, csrfmiddlewaretoken="xyz"))
+    assert arvc.decode(oldcookie) == prefill
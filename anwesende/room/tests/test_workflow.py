@@ -140,31 +140,43 @@ def _make_visits(django_app: wt.TestApp, seathash: str):
     assert mytime == "11:00"
     # --- fill visit form again (same device, overlapping time):
     visit_page_with_cookie = django_app.get(visit_url)
+    visitform = visit_page_with_cookie.forms['VisitForm']
     del data['present_from_dt']  # not stored in cookie
     del data['present_to_dt']  # not stored in cookie
-    _check_against(visit_page_with_cookie.form, data)
+    _check_against(visitform, data)
     changed_data = dict(givenname="B.",
                         phone="+49 1234 2", 
                         email="b@fam.de",
                         present_from_dt="11:20", present_to_dt="12:00")
-    _fill_with(visit_page_with_cookie.form, changed_data)
+    _fill_with(visitform, changed_data)
     with freeze_at("11:21"):
-        resp = visit_page_with_cookie.form.submit().follow()
+        resp = visitform.submit().follow()
         assert resp.request.path == reverse('room:thankyou', kwargs=dict(hash=seathash))
         resp = resp.click(linkid='seatslink')
     assert "2</b> verschiedene" in resp.text  # visitors_presentN
 
     # --- fill visit form again (same device, later time):
     visit_page3 = django_app.get(visit_url)
+    visitform3 = visit_page3.forms['VisitForm']
     del changed_data['present_from_dt']  # not stored in cookie
     del changed_data['present_to_dt']  # not stored in cookie
-    _check_against(visit_page3.form, changed_data)  # partial check suffices
+    _check_against(visitform3, changed_data)  # partial check suffices
     changed_data3 = dict(givenname="C.",
                          phone="+49 1234 3", 
                          email="c@fam.de",
                          present_from_dt="13:00", present_to_dt="14:00")
-    _fill_with(visit_page3.form, changed_data3)
-    resp = visit_page3.form.submit().follow()
+    _fill_with(visitform3, changed_data3)
+    resp = visitform3.submit().follow()
+
+    # --- quick registration (same device, person data from cookie):
+    visit_page4 = django_app.get(visit_url)
+    assert "C. Fam?" in visit_page4.text
+    quickform = visit_page4.forms['QuickVisitForm']
+    _fill_with(quickform, dict(present_from_dt="13:30", present_to_dt="14:00"))
+    resp = quickform.submit().follow()
+    assert resp.request.path == reverse('room:thankyou', kwargs=dict(hash=seathash))
+    visit = arm.Visit.objects.last()
+    assert (visit.givenname, visit.phone) == ("C.", "+49 1234 3")  # type: ignore[union-attr]
 
 
 def _browse_visits_by_department_report(django_app):
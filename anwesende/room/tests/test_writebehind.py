@@ -0,0 +1,33 @@
+import os
+
+import django.test as djt
+import pytest
+
+import anwesende.room.checkin as arci
+import anwesende.room.management.commands.flush_visit_journal as flush_visit_journal
+import anwesende.room.models as arm
+import anwesende.room.tests.makedata as artmd
+import anwesende.room.writebehind as arwb
+import anwesende.utils.date as aud
+from anwesende.room.tests.test_checkin import prefill
+
+
+@pytest.mark.django_db
+def test_write_behind(tmp_path):
+    seat, = artmd.make_seats("room1", 1)
+    from_, to_ = aud.make_dt('now', "11:00"), aud.make_dt('now', "12:00")
+    with djt.utils.override_settings(VISIT_WRITE_BEHIND=True, VISIT_FLUSH_INTERVAL_MS=0,
+                                     VISIT_JOURNAL_DIR=str(tmp_path)):
+        arci.store(arci.make_visit(prefill, seat.pk, from_, to_))
+        arci.store(arci.make_visit(dict(prefill, givenname="B.", cookie="bbbbbbbbbb"), seat.pk, from_, to_))
+        assert arm.Visit.objects.count() == 0  # not yet visible
+        assert arwb.flush() == 2
+        assert arwb.flush() == 0  # journal and batches are consumed
+        arci.store(arci.make_visit(dict(prefill, givenname="C.", cookie="cccccccccc"), seat.pk, from_, to_))
+        flush_visit_journal.Command().handle()
+        assert os.listdir(tmp_path) == []  # all consumed
+    visits = arm.Visit.objects.order_by('givenname')
+    assert [v.givenname for v in visits] == ["A.", "B.", "C."]
+    assert visits[0].seat == seat
+    assert visits[0].present_from_dt == from_
+    assert visits[0].status_3g == arm.G_IMPFT
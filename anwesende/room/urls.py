@@ -12,6 +12,8 @@ urlpatterns = [
          view=arv.FAQView.as_view(), name="faq"),
     path("import",
          view=arv.ImportView.as_view(), name="import"),
+    path("import/summary",
+         view=arv.ImportSummaryView.as_view(), name="import-summary"),
     path("qrcodes/<pk>",
          view=arv.QRcodesByImportView.as_view(), name="qrcodes-byimport"),
     path("qrcodes/<organization>/<department>/<building>",
@@ -20,8 +22,15 @@ urlpatterns = [
          view=arv.QRcodesByRoomsView.as_view(), name="qrcodes-byorgdepbldrm"),
     path("qrcode/<hash>",
          view=arv.QRcodeView.as_view(), name="qrcode"),
-    path("S<hash>",
+    path("S/<hash>",
          view=arv.VisitView.as_view(), name="visit"),
+    path("S/<hash>/quick",
+         view=arv.QuickVisitView.as_view(), name="visit-quick"),
+    path("S<hash>",
+         view=arv.LegacyVisitView.as_view(), name="legacy_visit"),
+    path("S<hash>/quick",
+         view=arv.LegacyVisitView.as_view(pattern_name='room:visit-quick'),
+         name="legacy_visit-quick"),
     path("search",
          view=arv.SearchView.as_view(), name="search"),
     path("search_room",
@@ -42,6 +51,8 @@ urlpatterns = [
          view=arv.ThankyouView.as_view(with_seats=True), name="thankyouseats"),
     path("thankyou/visitors_presentN=<visitors_presentN>",
          view=arv.LegacyThankyouView.as_view(), name="legacy_thankyou"),
+    path("metrics",
+         view=arv.MetricsView.as_view(), name="metrics"),
     path("uncookie",
          view=arv.UncookieView.as_view(), name="uncookie"),
     path('favicon.ico', RedirectView.as_view(
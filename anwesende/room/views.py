@@ -1,33 +1,42 @@
 import datetime as dt
+import hashlib
 import json
 import logging
 import os
-import traceback
+import secrets
 import typing as tg
 
 import django.contrib.auth.mixins as djcam
 import django.contrib.auth.views as djcav
 import django.contrib.messages as djcm
+import django.core.exceptions as djce
+import django.core.paginator as djcp
+import django.db as djdb
 import django.db.models as djdm
-from django.db.models import Count
 import django.http as djh
+import django.shortcuts as djs
+import django.template.response as djtr
 import django.urls as dju
 import django.utils.timezone as djut
 import django.views.generic.base as djvgb
 import vanilla as vv  # Django vanilla views
 from django.conf import settings
+from django.db import transaction
 
+import anwesende.room.checkin as arci
 import anwesende.room.excel as are
 import anwesende.room.forms as arf
 import anwesende.room.models as arm
 import anwesende.room.reports as arr
+import anwesende.room.roomtree as arrt
 import anwesende.room.utils as aru
+import anwesende.room.visitcookie as arvc
 import anwesende.utils.date as aud
+import anwesende.utils.dbrouter as audbr
+import anwesende.utils.metrics as aumet
 import anwesende.utils.lookup  # noqa,  registers lookup
 import anwesende.utils.qrcode as auq
 
-COOKIENAME = 'anwesende'
-
 
 class AddIsDatenverwalter:
     """
@@ -54,11 +63,115 @@ class AddSettings:
         return context
 
 
-class FAQView(AddSettings, vv.TemplateView):
+class Autocommit:
+    """
+    Exempts a view from ATOMIC_REQUESTS (which stays on for third-party views):
+    it runs in autocommit mode and wraps multi-statement writes 
+    in atomic blocks of its own, as tight as possible.
+    """
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return transaction.non_atomic_requests(
+                super().as_view(**initkwargs))  # type: ignore
+
+
+class ReadFromReplica:
+    """
+    For reporting views: make all reads of the request, including
+    the template rendering, from the read replica if there is one.
+    Must come first among the bases.
+    """
+    def dispatch(self, request: djh.HttpRequest, *args, **kwargs) -> djh.HttpResponse:
+        with audbr.reading_from_replica():
+            response = super().dispatch(request, *args, **kwargs)  # type: ignore
+            if isinstance(response, djtr.TemplateResponse):
+                response.render()  # querysets are evaluated here
+            return response
+
+
+class QueryDeadline(Autocommit):
+    """
+    For reporting views: run the request, including the template rendering,
+    in a READ ONLY transaction (on the database that reads go to)
+    whose statements are cancelled after query_deadline_ms. 
+    When that happens, show a "narrow your search" page.
+    (Inside an enclosing transaction, as in tests, only the timeout applies.)
+    Must come first among the bases, except for ReadFromReplica.
+    """
+    QUERY_CANCELED = '57014'  # PostgreSQL error code
+    query_deadline_ms: tg.Optional[int] = None  # None: settings.QUERY_DEADLINE_MS
+
+    def dispatch(self, request: djh.HttpRequest, *args, **kwargs) -> djh.HttpResponse:
+        deadline_ms = self.query_deadline_ms or settings.QUERY_DEADLINE_MS
+        alias = audbr.read_alias()
+        connection = djdb.connections[alias]
+        outermost = not connection.in_atomic_block
+        try:
+            with transaction.atomic(using=alias):
+                with connection.cursor() as cursor:
+                    if outermost:
+                        cursor.execute("SET TRANSACTION READ ONLY")
+                    cursor.execute("SET LOCAL statement_timeout = %s", [deadline_ms])
+                response = super().dispatch(request, *args, **kwargs)  # type: ignore
+                if isinstance(response, djtr.TemplateResponse):
+                    response.render()  # querysets are evaluated here
+                if not outermost:
+                    with connection.cursor() as cursor:
+                        cursor.execute("SET LOCAL statement_timeout = DEFAULT")
+                return response
+        except djdb.OperationalError as err:
+            if getattr(err.__cause__, 'pgcode', None) != self.QUERY_CANCELED:
+                raise
+            logging.getLogger('search').warning(
+                    f"{self.__class__.__name__}: deadline of {deadline_ms}ms exceeded")
+            return djs.render(request, "room/narrow_search.html",
+                              dict(settings=settings, seconds=deadline_ms / 1000))
+
+
+class RenderThankyou:
+    """
+    With settings.VISIT_RENDER_THANKYOU, answer a successful check-in POST
+    with the thank-you page itself rather than a redirect to it.
+    Reloading that page re-sends the POST, so the form's token and a digest
+    of the POSTed data are remembered in a cookie for the POST's path
+    to recognize resubmissions. A corrected submission (back, edit, submit)
+    has other data and is stored.
+    Each view has its own cookie name: cookies for /S/<hash> also reach /S/<hash>/quick.
+    """
+    token_cookiename = 'anwesende-token'
+    TOKEN_MAX_AGE = 3600 * 12  # seconds
+
+    def is_resubmission(self, token: tg.Optional[str]) -> bool:
+        return bool(settings.VISIT_RENDER_THANKYOU and token and
+                    self.tokenvalue(token) == self.request.COOKIES.get(  # type: ignore
+                            self.token_cookiename))
+
+    def tokenvalue(self, token: str) -> str:
+        post = self.request.POST  # type: ignore
+        payload = json.dumps(sorted((key, post.getlist(key)) for key in post
+                                    if key != 'csrfmiddlewaretoken'))
+        return f"{token}.{hashlib.sha256(payload.encode()).hexdigest()[:16]}"
+
+    def thankyou_response(self, hashvalue: str, 
+                          token: tg.Optional[str]) -> djh.HttpResponse:
+        if not settings.VISIT_RENDER_THANKYOU:
+            return djh.HttpResponseRedirect(
+                    dju.reverse('room:thankyou', kwargs=dict(hash=hashvalue)))
+        request = self.request  # type: ignore
+        response = djtr.TemplateResponse(request, "room/thankyou.html",
+                                         dict(hash=hashvalue, settings=settings))
+        if token:
+            response.set_cookie(key=self.token_cookiename, value=self.tokenvalue(token),
+                                max_age=self.TOKEN_MAX_AGE, path=request.path,
+                                httponly=True, samesite='Lax')
+        return response
+
+
+class FAQView(Autocommit, AddSettings, vv.TemplateView):
     template_name = "room/faq.html"
 
 
-class HomeView(AddSettings, vv.TemplateView):
+class HomeView(Autocommit, AddSettings, vv.TemplateView):
     template_name = "room/home.html"
 
     def get_context_data(self, **kwargs):
@@ -67,7 +180,7 @@ class HomeView(AddSettings, vv.TemplateView):
         return context
 
 
-class ImportView(AddIsDatenverwalter, AddSettings, vv.FormView):
+class ImportView(Autocommit, AddIsDatenverwalter, AddSettings, vv.FormView):
     """Import-Excel-for-QR-code-creation dialog."""
     form_class = arf.UploadFileForm
     template_name = "room/import.html"
@@ -78,11 +191,7 @@ class ImportView(AddIsDatenverwalter, AddSettings, vv.FormView):
             interval = dt.timedelta(days=8)
             imports = arm.Importstep.displayable_importsteps(interval)
         else:
-            room = arm.Seat.get_dummy_seat().room
-            importstep = room.importstep
-            importstep.organization = room.organization  # type: ignore[attr-defined]
-            importstep.department = room.department  # type: ignore[attr-defined]
-            imports = [importstep] 
+            imports = [arm.Seat.get_dummy_seat().room.importstep]
         context['imports'] = imports
         context['settings'] = settings
         return context
@@ -93,11 +202,30 @@ class ImportView(AddIsDatenverwalter, AddSettings, vv.FormView):
 
     def form_valid(self, form: arf.UploadFileForm):
         filename = form.cleaned_data['excelfile']  # form has created the file
-        self.importstep = are.create_seats_from_excel(filename, self.user)
+        if form.cleaned_data.get('multi_department'):
+            return self.multi_department_import(filename)
+        with aumet.timed('anwesende_import_seconds'):
+            self.importstep = are.create_seats_from_excel(filename, self.user)
         os.remove(filename)
         logging.info(f"ImportView({self.importstep})")
         return super().form_valid(form)
 
+    def multi_department_import(self, filename: str) -> djh.HttpResponse:
+        with aumet.timed('anwesende_import_seconds'):
+            results = are.create_seats_from_excel_by_department(filename, self.user)
+        os.remove(filename)
+        steps = []
+        for organization, department, result in results:
+            if isinstance(result, arm.Importstep):
+                logging.info(f"ImportView({result})")
+                steps.append(str(result.pk))
+            else:
+                djcm.add_message(self.request, djcm.ERROR,
+                                 f"Import für {organization}, {department} "
+                                 f"fehlgeschlagen: {result}")
+        return djh.HttpResponseRedirect(
+                dju.reverse('room:import-summary') + "?steps=" + ",".join(steps))
+
     def get_success_url(self):
         return dju.reverse('room:qrcodes-byimport', kwargs=dict(pk=self.importstep.pk))
 
@@ -108,18 +236,63 @@ class ImportView(AddIsDatenverwalter, AddSettings, vv.FormView):
             return djcav.redirect_to_login(next, login_url, 'next')
         return super().post(request, *args, **kwargs)
 
-class QRcodesByImportView(AddIsDatenverwalter, AddSettings, vv.DetailView):
+
+class ImportSummaryView(Autocommit, djcam.LoginRequiredMixin, AddIsDatenverwalter,
+                        AddSettings, vv.TemplateView):
+    """The Importsteps made by one multi-department import."""
+    template_name = "room/import_summary.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if not self.is_datenverwalter:
+            raise djce.PermissionDenied()
+        pks = [int(pk) for pk in self.request.GET.get('steps', "").split(",")
+               if pk.isdigit()]
+        imports = list(arm.Importstep.objects.filter(pk__in=pks)
+                       .select_related('user').order_by('when'))
+        context['imports'] = imports
+        context['totals'] = {field: sum(getattr(step, field) for step in imports)
+                             for field in ('num_new_rooms', 'num_existing_rooms',
+                                           'num_new_seats', 'num_existing_seats',
+                                           'num_qrcodes')}
+        return context
+
+
+class QRcodesPage:
+    """
+    Puts one page of 'seats' from get_seats_qs() into context.
+    Large imports have thousands of QR codes; one page each would get huge.
+    """
+    qrcodes_per_page = 200
+
+    def get_seats_qs(self) -> djdm.QuerySet:
+        raise NotImplementedError  # defined by each view
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)  # type: ignore
+        paginator = djcp.Paginator(self.get_seats_qs(), self.qrcodes_per_page)
+        page = paginator.get_page(self.request.GET.get('page'))  # type: ignore
+        seats = list(page.object_list)  # retrieve them only once
+        context['seats'] = seats
+        context['room'] = seats[0].room if seats else None
+        context['page_obj'] = page
+        return context
+
+
+class QRcodesByImportView(Autocommit, QRcodesPage, AddIsDatenverwalter, AddSettings,
+                          vv.DetailView):
     """Show printable QR codes created in one Importstep."""
     model = arm.Importstep
     template_name = "room/qrcodes.html"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        seats = arm.Seat.objects.filter(room__importstep=self.object)
-        context['seats'] = seats
         context['listtype'] = 'importstep'
         return context
 
+    def get_seats_qs(self):
+        return arm.Seat.listing_qs(room__importstep=self.object)
+
     def get_object(self):
         object = super().get_object()
         if self.is_datenverwalter or object == arm.Seat.get_dummy_seat().room.importstep:
@@ -128,14 +301,13 @@ class QRcodesByImportView(AddIsDatenverwalter, AddSettings, vv.DetailView):
             raise djh.Http404
 
 
-class QRcodesByRoomsView(djcam.LoginRequiredMixin, 
+class QRcodesByRoomsView(Autocommit, djcam.LoginRequiredMixin, QRcodesPage,
                          AddIsDatenverwalter, AddSettings, vv.TemplateView):
     """Show printable QR codes for one room or one building."""
     template_name = "room/qrcodes.html"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['seats'] = self.get_queryset().all()
         context['listtype'] = 'byrooms'
         return context
 
@@ -143,15 +315,9 @@ class QRcodesByRoomsView(djcam.LoginRequiredMixin,
         pop_org_dept_bldg_room(self)
         return super().get(request, *args, **kwargs)
         
-    def get_queryset(self):
-        qs = arm.Seat.objects.filter(
-                room__organization=self.organization,
-                room__department=self.department,
-                room__building=self.building)
-        if self.room:
-            return qs.filter(room__room=self.room)
-        else:
-            return qs
+    def get_seats_qs(self):
+        return arm.Seat.listing_qs(room_id__in=arrt.room_ids(
+                self.organization, self.department, self.building, self.room))
 
 def pop_org_dept_bldg_room(view):
     """
@@ -163,7 +329,7 @@ def pop_org_dept_bldg_room(view):
         setattr(view, f"{arg}", aru.unescape_slash(val))  # the real value
 
 
-class QRcodeView(AddIsDatenverwalter, AddSettings, vv.View):
+class QRcodeView(Autocommit, AddIsDatenverwalter, AddSettings, vv.View):
     """Render one QR code as SVG."""
     def get(self, request, *args, **kwargs):
         if not self.is_datenverwalter \
@@ -175,7 +341,7 @@ class QRcodeView(AddIsDatenverwalter, AddSettings, vv.View):
         return djh.HttpResponse(qrcode_bytes, content_type="image/svg+xml")
 
 
-class ShowRoomsView(djcam.LoginRequiredMixin,
+class ShowRoomsView(ReadFromReplica, Autocommit, djcam.LoginRequiredMixin,
                     AddIsDatenverwalter, AddSettings, vv.TemplateView):
     """Browse list of departments, buildings, rooms; navigate to QR codes."""
     template_name = "room/show_rooms.html"
@@ -188,44 +354,36 @@ class ShowRoomsView(djcam.LoginRequiredMixin,
         context = super().get_context_data()
         if self.building:
             context['type'] = "building"
-            context['rooms'] = arm.Room.objects.filter(
-                    organization=self.organization,
-                    department=self.department,
-                    building=self.building)
+            context['rooms'] = arrt.rooms(
+                    self.organization, self.department, self.building)
         elif self.department:
             context['type'] = "department"
-            context['buildings'] = (arm.Room.objects
-                    .filter(organization=self.organization, 
-                            department=self.department)
-                    .order_by('building')
-                    .values('building')
-                    .annotate(rooms=Count("id", distinct=True)))
+            context['buildings'] = arrt.buildings(
+                    self.organization, self.department)
         else:
             context['type'] = "overview"
-            context['departments'] = (arm.Room.objects
-                    .order_by('organization', 'department')
-                    .values('organization', 'department')
-                    .annotate(buildings=Count("building", distinct=True)))
+            context['departments'] = arrt.departments()
         return context
 
 
-class VisitView(AddSettings, vv.CreateView):
+def seat_or_404(hashvalue: str) -> arm.Seat:
+    """The seat and its room; the hash lookup is served by the shared cache."""
+    seat = (arm.Seat.objects.select_related('room')
+            .filter(pk=arci.seat_id_by_hash(hashvalue)).first())
+    if seat is None:
+        raise djh.Http404()
+    return seat
+
+
+class VisitView(Autocommit, RenderThankyou, AddSettings, vv.CreateView):
     """Centerpiece: The registration dialog for room visitors."""
     model = arm.Visit
     form_class = arf.VisitForm
     template_name = "room/visit.html"
 
-    def get_success_url(self):
-        return dju.reverse('room:thankyou', 
-                           kwargs=dict(hash=self.object.seat.hash))
-    
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        hashvalue = self.kwargs['hash']
-        if not arm.Seat.exists(hashvalue):
-            raise djh.Http404()
-        seat = arm.Seat.by_hash(hashvalue)
-        ctx['seat'] = seat
+        seat = ctx['seat'] = seat_or_404(self.kwargs['hash'])
         ctx['room'] = seat.room
         ctx['settings'] = settings
         retention_3g = settings.DATA_RETENTION_DAYS_STATUS_3G
@@ -237,6 +395,10 @@ class VisitView(AddSettings, vv.CreateView):
                                        retention_3g)
         else:
             ctx['status_3g_stmt_de'] = ctx['status_3g_stmt_en'] = ""
+        prefill = getattr(self, 'prefill', None)
+        ctx['quickcheckin'] = prefill if arci.is_complete(prefill) else None
+        ctx['now'] = aud.nowstring(date=False, time=True)
+        ctx['quicktoken'] = secrets.token_urlsafe(12)  # not the form's: see RenderThankyou
         return ctx
 
     
@@ -245,19 +407,15 @@ class VisitView(AddSettings, vv.CreateView):
             data = {k: v for k, v in data.items()}  # extract ordinary dict
             return arf.VisitForm(data=data, files=files, **kwargs)
         # else GET:
-        if COOKIENAME in self.request.COOKIES:
-            try:
-                thecookie = self.request.COOKIES[COOKIENAME]
-                initial = json.loads(thecookie)
-            except json.JSONDecodeError as err:
-                tb = traceback.format_exc(limit=12, chain=True)
-                logging.warning(f"VisitView: broken cookie >>>>{thecookie}<<<<\n{tb}")
-                initial = dict(cookie=arm.Visit.make_cookie())
-                logging.info(f"VisitView: ersatz {initial}")
-        else:
+        thecookie = arvc.fetch(self.request.COOKIES)
+        initial = self.prefill = thecookie and arvc.decode(thecookie)
+        if thecookie and not initial:
+            logging.warning(f"VisitView: broken cookie >>>>{thecookie}<<<<")
+        if not initial:
             initial = dict(cookie=arm.Visit.make_cookie())
             logging.info(f"VisitView: new {initial}")
         initial['present_from_dt'] = aud.nowstring(date=False, time=True)
+        initial['token'] = secrets.token_urlsafe(12)
         return arf.VisitForm(initial=initial)
         
     def form_invalid(self, form: arf.VisitForm):
@@ -266,29 +424,71 @@ class VisitView(AddSettings, vv.CreateView):
         return super().form_invalid(form)
 
     def form_valid(self, form: arf.VisitForm):
+        hashvalue = self.kwargs['hash']
+        token = form.cleaned_data.get('token')
+        if self.is_resubmission(token):
+            logging.info(f"VisitView({hashvalue}): resubmission ignored")
+            aumet.inc('anwesende_checkins_total', kind='form', result='resubmitted')
+            return self.thankyou_response(hashvalue, token)
         self.object = form.save(commit=False)
-        self.object.seat = arm.Seat.by_hash(self.kwargs['hash'])
-        self.object.save()
+        self.object.seat = arm.Seat.by_hash(hashvalue)
         o = self.object
-        logging.info(f"VisitView({o.seat.hash}): {o.givenname}; {o.email}; {o.zipcode}; {o.cookie}")
-        response = djh.HttpResponseRedirect(self.get_success_url())
-        response.set_cookie(key=COOKIENAME, value=self.get_cookiejson(form), 
-                            max_age=3600 * 24 * 90)
+        if arci.store(o):
+            logging.info(f"VisitView({o.seat.hash}): {o.givenname}; {o.email}; {o.zipcode}; {o.cookie}")
+            aumet.inc('anwesende_checkins_total', kind='form', result='stored')
+        else:
+            logging.info(f"VisitView({o.seat.hash}): repeated submission ignored")
+            aumet.inc('anwesende_checkins_total', kind='form', result='repeated')
+        response = self.thankyou_response(o.seat.hash, token)
+        cookievalue = arvc.encode(form.cleaned_data)
+        if cookievalue:
+            arvc.store(response, cookievalue)
+        else:
+            logging.warning(f"VisitView({o.seat.hash}): cookie too long, not stored")
         return response
 
-    def get_cookiejson(self, form):
-        cookiedict = {k: v for k, v, in
-                      form.data.items()}  # extract ordinary dict
-        del cookiedict['csrfmiddlewaretoken']
-        del cookiedict['present_from_dt']
-        del cookiedict['present_to_dt']
-        if 'submit' in cookiedict:
-            del cookiedict['submit']
-        cookiejson = json.dumps(cookiedict)
-        return cookiejson
+
+class QuickVisitView(Autocommit, RenderThankyou, vv.GenericView):
+    """
+    Lean registration for returning visitors (POST only): 
+    person data come from the cookie, only the times from the form.
+    """
+    token_cookiename = 'anwesende-quicktoken'
+
+    def post(self, request, *args, **kwargs):
+        hashvalue = self.kwargs['hash']
+        visit_url = dju.reverse('room:visit', kwargs=dict(hash=hashvalue))
+        seat_id = arci.seat_id_by_hash(hashvalue)
+        if seat_id is None:
+            raise djh.Http404()
+        thecookie = arvc.fetch(request.COOKIES)
+        prefill = thecookie and arvc.decode(thecookie)
+        if settings.STANDBY_MODE or not prefill:
+            return djh.HttpResponseRedirect(visit_url)
+        token = request.POST.get('token')
+        if self.is_resubmission(token):
+            logging.info(f"QuickVisitView({hashvalue}): resubmission ignored")
+            aumet.inc('anwesende_checkins_total', kind='quick', result='resubmitted')
+            return self.thankyou_response(hashvalue, token)
+        timefield = arf.TimeOnlyDateTimeField()
+        try:
+            o = arci.make_visit(prefill, seat_id,
+                                timefield.to_python(request.POST.get('present_from_dt')),
+                                timefield.to_python(request.POST.get('present_to_dt')))
+        except djce.ValidationError as err:
+            msg = "Bitte Eingaben überprüfen / Please check your inputs"
+            djcm.add_message(request, djcm.ERROR, f"{msg}: {'; '.join(err.messages)}")
+            return djh.HttpResponseRedirect(visit_url)
+        if arci.store(o):
+            logging.info(f"QuickVisitView({hashvalue}): {o.givenname}; {o.email}; {o.zipcode}; {o.cookie}")
+            aumet.inc('anwesende_checkins_total', kind='quick', result='stored')
+        else:
+            logging.info(f"QuickVisitView({hashvalue}): repeated submission ignored")
+            aumet.inc('anwesende_checkins_total', kind='quick', result='repeated')
+        return self.thankyou_response(hashvalue, token)
 
 
-class ThankyouView(AddSettings, vv.TemplateView):
+class ThankyouView(Autocommit, AddSettings, vv.TemplateView):
     template_name = "room/thankyou.html"
     with_seats = False  # initkwarg
 
@@ -298,9 +498,7 @@ class ThankyouView(AddSettings, vv.TemplateView):
         ctx['hash'] = hashvalue
         if not self.with_seats:
             return ctx
-        if not arm.Seat.exists(hashvalue):
-            raise djh.Http404()
-        seat = ctx['seat'] = arm.Seat.by_hash(hashvalue)
+        seat = ctx['seat'] = seat_or_404(hashvalue)
         room = ctx['room'] = seat.room
         ctx['with_seats'] = self.with_seats
         seats = (room.current_unique_visitors_qs()
@@ -311,12 +509,26 @@ class ThankyouView(AddSettings, vv.TemplateView):
         return ctx
 
 
+class LegacyVisitView(vv.GenericView):
+    """
+    Visit URLs used to be /S<hash> and are printed in many QR codes.
+    Redirect with 308 so that a POST stays a POST.
+    """
+    pattern_name = 'room:visit'
+
+    def dispatch(self, request, *args, **kwargs):
+        response = djh.HttpResponsePermanentRedirect(
+                dju.reverse(self.pattern_name, kwargs=dict(hash=kwargs['hash'])))
+        response.status_code = 308
+        return response
+
+
 class LegacyThankyouView(djvgb.RedirectView):
     def get(self, *args, **kwargs):
         return djh.HttpResponsePermanentRedirect(dju.reverse_lazy('room:home'))
 
 
-class VisitsByDepartmentView(djcam.LoginRequiredMixin,
+class VisitsByDepartmentView(ReadFromReplica, QueryDeadline, djcam.LoginRequiredMixin,
                              AddIsDatenverwalter, AddSettings, vv.TemplateView):
     """Show table of #rooms and #visits per department."""
     template_name = "room/visitsbydepartment.html"
@@ -330,7 +542,7 @@ class VisitsByDepartmentView(djcam.LoginRequiredMixin,
         return context
 
 
-class VisitorsByWeekView(djcam.LoginRequiredMixin,
+class VisitorsByWeekView(ReadFromReplica, QueryDeadline, djcam.LoginRequiredMixin,
                          AddIsDatenverwalter, AddSettings, vv.TemplateView):
     """Show filtered table of #visits and #visitors (and #rooms etc.) per week."""
     form_class = arf.RoomdescriptorForm
@@ -353,15 +565,25 @@ class VisitorsByWeekView(djcam.LoginRequiredMixin,
         return context
 
 
-class UncookieView(vv.GenericView):
+class MetricsView(Autocommit, djcam.LoginRequiredMixin, AddIsDatenverwalter, vv.GenericView):
+    """Performance metrics of all worker processes, in Prometheus text format."""
+    def get(self, request, *args, **kwargs):
+        if not self.is_datenverwalter:
+            raise djce.PermissionDenied()
+        return djh.HttpResponse(aumet.render(),
+                                content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+class UncookieView(Autocommit, vv.GenericView):
     """Get rid of the cookie that stores the person data entered in VisitView."""
     def get(self, request, *args, **kwargs):
         response = djh.HttpResponse("Cookie expired")
-        response.set_cookie(COOKIENAME, "", max_age=0)  # expire now
+        arvc.expire(response)
         return response
 
 
-class AnySearchView(AddIsDatenverwalter, AddSettings, vv.ListView):
+class AnySearchView(ReadFromReplica, QueryDeadline, AddIsDatenverwalter, AddSettings,
+                    vv.ListView):
     """
     Dialog by which Datenverwalters retrieve contact group data.
     Kludge: Uses the same view for a valid form (instead of redirecting). 
@@ -422,22 +644,18 @@ class AnySearchView(AddIsDatenverwalter, AddSettings, vv.ListView):
             return self.render_to_response(context)
 
     def _log_post(self, context):
-        logcontext = context.copy()
-        if 'visits' in logcontext:
-            del logcontext['visits']
-        if 'rooms' in logcontext:
-            del logcontext['rooms']
-        if 'environ' in logcontext:
-            del logcontext['environ']
-        if 'form' in logcontext:
-            logcontext['form'] = logcontext['form'].data
-        logging.getLogger('search').info(f"{self.__class__.__name__}({logcontext}")
+        logcontext = {key: (value.data if key == 'form' else value)
+                      for key, value in context.items()
+                      if key not in ('visits', 'rooms', 'environ')}
+        # formatted only when written, see utils/logqueue.py:
+        logging.getLogger('search').info("%s(%s", self.__class__.__name__, logcontext)
 
     def excel_download_response(self, visits: tg.List[tg.Optional[arm.Visit]]) -> djh.HttpResponse:
         # https://stackoverflow.com/questions/4212861
         excel_contenttype_excel = \
             "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        excelbytes = are.get_excel_download(visits)
+        with aumet.timed('anwesende_export_seconds'):
+            excelbytes = are.get_excel_download(visits)
         response = djh.HttpResponse(excelbytes,
                                     content_type=excel_contenttype_excel)
         timestamp = aud.nowstring(date=True, time=True)
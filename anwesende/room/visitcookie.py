@@ -0,0 +1,85 @@
+"""
+The visitor cookie remembers the person data entered in VisitView
+for prefilling the form on the next visit.
+It is sent with every request to the visit pages, so it is kept small:
+a version tag and the values of FIELDS, joined by an ASCII unit separator,
+base64-encoded and signed; at most MAXLENGTH characters.
+No JSON is involved except for reading old (version 1) JSON cookies.
+The cookie's path is restricted to COOKIEPATH, the URL prefix of the visit pages,
+so static files and the other pages do not carry it.
+Cookies from before that had path '/' and are read, but replaced, under OLD_COOKIENAME:
+with the same name, the browser would send both and the old one would win.
+"""
+import base64
+import binascii
+import json
+import typing as tg
+
+import django.core.signing as djcs
+import django.http as djh
+
+COOKIENAME = 'anwesende-visitor'
+COOKIEPATH = '/S/'  # must match the 'visit' and 'visit-quick' URLs, see urls.py
+OLD_COOKIENAME = 'anwesende'  # path '/'
+MAX_AGE = 3600 * 24 * 90  # seconds
+MAXLENGTH = 1000  # characters of the encoded cookie value
+FIELDS = ('givenname', 'familyname', 'street_and_number', 'zipcode', 'town',
+          'phone', 'email', 'status_3g', 'cookie')
+VERSION = "2"
+SEPARATOR = "\x1f"  # ASCII unit separator; input is validated to be printable
+SALT = "anwesende.room.visitcookie"
+
+Prefill = tg.Dict[str, str]
+
+
+def fetch(cookies: tg.Mapping[str, str]) -> tg.Optional[str]:
+    """The raw cookie value from request.COOKIES, if any."""
+    return cookies.get(COOKIENAME) or cookies.get(OLD_COOKIENAME)
+
+
+def store(response: djh.HttpResponse, value: str) -> None:
+    response.set_cookie(key=COOKIENAME, value=value, max_age=MAX_AGE, path=COOKIEPATH,
+                        httponly=True, samesite='Lax')
+    response.delete_cookie(OLD_COOKIENAME)
+
+
+def expire(response: djh.HttpResponse) -> None:
+    response.delete_cookie(COOKIENAME, path=COOKIEPATH)
+    response.delete_cookie(OLD_COOKIENAME)
+
+
+def encode(data: tg.Mapping[str, tg.Any]) -> tg.Optional[str]:
+    """Cookie value for the FIELDS in data or None if it would be too long."""
+    values = [str(data.get(field) or "").replace(SEPARATOR, "") for field in FIELDS]
+    payload = SEPARATOR.join([VERSION] + values).encode()
+    b64 = base64.urlsafe_b64encode(payload).decode().rstrip("=")
+    value = djcs.Signer(salt=SALT).sign(b64)
+    return value if len(value) <= MAXLENGTH else None
+
+
+def decode(value: str) -> tg.Optional[Prefill]:
+    """Prefill data from a cookie value or None if it is unusable."""
+    if len(value) > MAXLENGTH:
+        return None
+    if value.startswith("{"):
+        return _decode_version1(value)
+    try:
+        b64 = djcs.Signer(salt=SALT).unsign(value)
+        payload = base64.urlsafe_b64decode(b64 + "=" * (-len(b64) % 4)).decode()
+    except (djcs.BadSignature, binascii.Error, UnicodeDecodeError):
+        return None
+    version, *values = payload.split(SEPARATOR)
+    if version != VERSION or len(values) != len(FIELDS):
+        return None
+    return dict(zip(FIELDS, values))
+
+
+def _decode_version1(value: str) -> tg.Optional[Prefill]:
+    # unsigned JSON of the raw form data, as written until version 2 came
+    try:
+        data = json.loads(value)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    return {field: str(data[field]) for field in FIELDS if field in data}
@@ -0,0 +1,140 @@
+"""
+Write-behind mode for Visits (settings.VISIT_WRITE_BEHIND):
+check-ins append their validated Visit to an append-only journal file
+(one JSON line each, fsynced) instead of INSERTing it right away.
+A flusher thread in each worker process (or the flush_visit_journal command)
+moves the journal into the database with multi-row INSERTs.
+
+Staleness bound: Reads (occupancy on the thank-you page, contact searches,
+reports) do not see journaled visits until they are flushed, i.e. for
+about VISIT_FLUSH_INTERVAL_MS plus the flush itself, as long as some
+worker is running. Journaled visits get their submission_dt when flushed.
+
+Handoff protocol (safe across threads and processes via flock):
+the flusher renames the journal to a unique batch file while holding
+its lock; writers that still had the old file open notice the changed
+inode and write to the fresh journal instead.
+A batch file is deleted only after its INSERT has committed.
+If a flusher dies in between, the batch is inserted again later,
+which constraint visit_unique_submission turns into a no-op.
+"""
+import datetime as dt
+import fcntl
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+import django.db as djdb
+
+import anwesende.room.models as arm
+
+JOURNAL_NAME = "journal"
+BATCH_PREFIX = "batch-"
+FIELDS = ('givenname', 'familyname', 'street_and_number', 'zipcode', 'town',
+          'phone', 'email', 'status_3g', 'cookie', 'seat_id')
+DT_FIELDS = ('present_from_dt', 'present_to_dt')
+
+_flusher_pid = None  # process that has started its flusher thread
+_flusher_lock = threading.Lock()
+
+
+def append(visit: arm.Visit) -> None:
+    """Durably store visit in the journal."""
+    record = {field: getattr(visit, field) for field in FIELDS}
+    record.update({field: getattr(visit, field).isoformat() for field in DT_FIELDS})
+    line = json.dumps(record) + "\n"
+    journal = _path(JOURNAL_NAME)
+    while True:
+        with open(journal, 'a', encoding='utf8') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)  # released by close()
+            if os.fstat(f.fileno()).st_ino != _inode(journal):
+                continue  # file has meanwhile become a batch file: use new journal
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+            break
+    _ensure_flusher()
+
+
+def flush() -> int:
+    """Insert all journaled visits into the database; return how many were read."""
+    _claim_journal()
+    return sum(_insert_batch(batchfile)
+               for batchfile in sorted(glob.glob(_path(BATCH_PREFIX + "*"))))
+
+
+def _claim_journal() -> None:
+    journal = _path(JOURNAL_NAME)
+    with open(journal, 'a', encoding='utf8') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        if f.tell() == 0 or os.fstat(f.fileno()).st_ino != _inode(journal):
+            return  # nothing to do or somebody else claimed it
+        batchname = "%s%d-%d-%d" % (BATCH_PREFIX, time.time_ns(),
+                                    os.getpid(), threading.get_ident())
+        os.rename(journal, _path(batchname))
+
+
+def _insert_batch(batchfile: str) -> int:
+    try:
+        f = open(batchfile, 'r', encoding='utf8')
+    except FileNotFoundError:
+        return 0  # another flusher has just finished it
+    with f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return 0  # another flusher is working on it
+        if not os.path.exists(batchfile):
+            return 0  # another flusher has finished it
+        visits = [_as_visit(line) for line in f if line.endswith("\n")]
+        with djdb.transaction.atomic():
+            arm.Visit.objects.bulk_create(visits, batch_size=500,
+                                          ignore_conflicts=True)  # repeats
+        os.unlink(batchfile)
+    return len(visits)
+
+
+def _as_visit(line: str) -> arm.Visit:
+    record = json.loads(line)
+    for field in DT_FIELDS:
+        record[field] = dt.datetime.fromisoformat(record[field])
+    return arm.Visit(**record)
+
+
+def _ensure_flusher() -> None:
+    global _flusher_pid
+    if _flusher_pid == os.getpid() or settings.VISIT_FLUSH_INTERVAL_MS <= 0:
+        return
+    with _flusher_lock:
+        if _flusher_pid != os.getpid():  # also true in a freshly forked worker
+            _flusher_pid = os.getpid()
+            threading.Thread(target=_flusher_loop, name="visit-flusher",
+                             daemon=True).start()
+
+
+def _flusher_loop() -> None:
+    while True:
+        time.sleep(settings.VISIT_FLUSH_INTERVAL_MS / 1000.0)
+        try:
+            flush()
+        except Exception as err:
+            logging.getLogger('error').error("visit journal flush failed", exc_info=err)
+            djdb.connection.close()  # get a fresh one next time
+        else:
+            djdb.close_old_connections()  # obey CONN_MAX_AGE, e.g. return it to the pool
+
+
+def _path(filename: str) -> str:
+    os.makedirs(settings.VISIT_JOURNAL_DIR, exist_ok=True)
+    return os.path.join(settings.VISIT_JOURNAL_DIR, filename)
+
+
+def _inode(path: str) -> int:
+    try:
+        return os.stat(path).st_ino
+    except FileNotFoundError:
+        return -1
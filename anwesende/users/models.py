@@ -16,12 +16,19 @@ class User(djcam.AbstractUser):
     def assign_datenverwalter_group(self) -> None:
         group = self.get_datenverwalter_group()
         self.groups.add(group)
+        self.__dict__.pop('_is_datenverwalter', None)  # forget cached answer
 
     def is_datenverwalter(self) -> bool:
-        return self.groups.filter(id=self.get_datenverwalter_group().id).exists()
+        """
+        Asked at most once per User object, i.e. once per request, 
+        so group changes in the admin become effective with the next request.
+        """
+        if '_is_datenverwalter' not in self.__dict__:
+            # join on the unique group name: no need to look up the group first
+            self._is_datenverwalter = self.groups.filter(name=self.STAFF_GROUP).exists()
+        return self._is_datenverwalter
 
     @classmethod
     def get_datenverwalter_group(cls) -> djcam.Group:
-        if not djcam.Group.objects.filter(name=cls.STAFF_GROUP).exists():
-            fresh_group = djcam.Group.objects.create(name=cls.STAFF_GROUP)  # noqa
-        return djcam.Group.objects.get_by_natural_key(cls.STAFF_GROUP)
+        group, created = djcam.Group.objects.get_or_create(name=cls.STAFF_GROUP)
+        return group
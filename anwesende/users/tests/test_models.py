@@ -7,3 +7,16 @@ pytestmark = pytest.mark.django_db
 
 def test_user_get_absolute_url(user: User):
     assert user.get_absolute_url() == f"/users/{user.username}/"
+
+
+def test_user_is_datenverwalter(user: User, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        assert not user.is_datenverwalter()
+        assert not user.is_datenverwalter()  # cached
+    user.assign_datenverwalter_group()
+    with django_assert_num_queries(1):
+        assert user.is_datenverwalter()
+        assert user.is_datenverwalter()  # cached
+    fresh_user = User.objects.get(pk=user.pk)  # as in the next request
+    fresh_user.groups.clear()
+    assert not fresh_user.is_datenverwalter()
@@ -0,0 +1,51 @@
+"""
+Cache-aside access to the 'shared' cache tier.
+Unlike the per-process 'default' cache, all worker processes of a server
+share it (file-based in production: no extra service is needed and
+its content survives worker recycling via gunicorn --max-requests).
+Each key gets its own timeout (seconds).
+Every write to the file-based tier scans its directory (for culling),
+so it is only meant for values that are read far more often than written.
+"""
+import typing as tg
+
+import django.core.cache as djcc
+import django.core.cache.backends.base as djccbb
+
+import anwesende.utils.metrics as aumet
+
+SHARED = 'shared'  # name in settings.CACHES
+LOCAL = 'default'  # per process, name in settings.CACHES
+T = tg.TypeVar('T')
+
+
+def shared() -> djccbb.BaseCache:
+    return djcc.caches[SHARED]
+
+
+def get_or_compute(key: str, compute: tg.Callable[[], T], timeout: float) -> T:
+    """Cached value for key, else compute() (cached unless it is None)."""
+    value = shared().get(key)
+    aumet.inc('anwesende_cache_requests_total', cache=SHARED,
+              result="miss" if value is None else "hit")
+    if value is None:
+        value = compute()
+        if value is not None:
+            shared().set(key, value, timeout)
+    return value
+
+
+def local() -> djccbb.BaseCache:
+    return djcc.caches[LOCAL]
+
+
+def add(key: str, timeout: float) -> bool:
+    """
+    Mark key as present in this process; False if it was present already.
+    Cheap enough for every request, but other processes do not see it.
+    """
+    return local().add(key, True, timeout)
+
+
+def delete(key: str) -> None:
+    local().delete(key)
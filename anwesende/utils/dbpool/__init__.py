@@ -0,0 +1,8 @@
+"""
+PostgreSQL database backend with a bounded connection pool per worker process:
+ENGINE "anwesende.utils.dbpool" plus, in the DATABASES entry,
+POOL = dict(SIZE=..., TIMEOUT=..., MAX_IDLE=...); see pool.py.
+Use with CONN_MAX_AGE=0, so that each thread returns its connection
+to the pool at the end of each request instead of keeping it.
+"""
+from anwesende.utils.dbpool.pool import ConnectionPool, PoolTimeout, pool_stats  # noqa
@@ -0,0 +1,43 @@
+import django.db.backends.postgresql.base as djdbbpb
+import psycopg2.extensions as pge
+
+import anwesende.utils.dbpool.pool as audp
+
+
+class DatabaseWrapper(djdbbpb.DatabaseWrapper):
+    """Takes connections from the process's pool and returns them on close()."""
+    @property
+    def pool(self) -> audp.ConnectionPool:
+        return audp.get_pool(self.alias, self.settings_dict.get('POOL', {}))
+
+    def get_new_connection(self, conn_params):
+        conn = self.pool.checkout(
+                connect=lambda: super(DatabaseWrapper, self).get_new_connection(conn_params),
+                is_usable=_is_usable)
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+                'isolation_level', conn.isolation_level)
+        return conn
+
+    def _close(self):
+        if self.connection is None:
+            return
+        conn = self.connection
+        with self.wrap_database_errors:  # type: ignore  # a property (stubs say method)
+            reusable = not conn.closed
+            if reusable and conn.get_transaction_status() != pge.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()  # e.g. closed in the middle of an atomic block
+                except Exception:
+                    reusable = False
+            self.pool.checkin(conn, reusable=reusable)
+
+
+def _is_usable(conn) -> bool:
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        if not conn.autocommit:
+            conn.rollback()
+        return True
+    except Exception:
+        return False
@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+import typing as tg
+
+import django.db as djdb
+
+Conn = tg.Any  # a DB-API connection
+
+
+class PoolTimeout(djdb.OperationalError):
+    pass  # no connection became available within the checkout timeout
+
+
+class ConnectionPool:
+    """
+    At most size connections, created on demand.
+    checkout() waits up to timeout seconds for a free one.
+    Connections idle for more than max_idle seconds are closed.
+    Connections idle for more than ping_after seconds are validated first.
+    """
+    def __init__(self, size: int, timeout: float, max_idle: float,
+                 ping_after: float = 10.0):
+        self.size, self.timeout = size, timeout
+        self.max_idle, self.ping_after = max_idle, ping_after
+        self._idle: tg.List[tg.Tuple[Conn, float]] = []  # (conn, since), LIFO
+        self._numconns = 0  # idle plus checked out
+        self._cond = threading.Condition()
+        self._stats = dict(checkouts=0, waits=0, timeouts=0, created=0,
+                           closed=0, wait_seconds=0.0)
+
+    def checkout(self, connect: tg.Callable[[], Conn],
+                 is_usable: tg.Callable[[Conn], bool]) -> Conn:
+        start = time.monotonic()
+        waited = False
+        while True:
+            conn, since, waited = self._take(start, waited)
+            if conn is None:
+                break  # a new connection is reserved
+            # is_usable() is a round trip: do not hold the lock meanwhile
+            if time.monotonic() - since < self.ping_after or is_usable(conn):
+                with self._cond:
+                    self._count_checkout(start, waited)
+                return conn
+            with self._cond:
+                self._discard(conn)
+                self._cond.notify()
+        try:
+            conn = connect()
+        except Exception:
+            with self._cond:
+                self._numconns -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats['created'] += 1
+        return conn
+
+    def checkin(self, conn: Conn, reusable: bool = True) -> None:
+        with self._cond:
+            if reusable:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._discard(conn)
+            self._cond.notify()
+
+    def close_idle(self) -> None:
+        with self._cond:
+            self._close_idle(max_idle=-1.0)
+
+    def stats(self) -> tg.Dict[str, tg.Any]:
+        with self._cond:
+            return dict(self._stats, size=self.size, connections=self._numconns,
+                        idle=len(self._idle), in_use=self._numconns - len(self._idle))
+
+    def _take(self, start: float, waited: bool
+              ) -> tg.Tuple[tg.Optional[Conn], float, bool]:
+        """
+        Pop the newest idle connection: (conn, idle since, waited).
+        Or reserve a new one: (None, 0.0, waited). Wait if neither is possible.
+        """
+        with self._cond:
+            while True:
+                self._close_idle(max_idle=self.max_idle)
+                if self._idle:
+                    conn, since = self._idle.pop()
+                    return conn, since, waited
+                if self._numconns < self.size:
+                    self._numconns += 1  # reserve; connect outside the lock
+                    self._count_checkout(start, waited)
+                    return None, 0.0, waited
+                remaining = start + self.timeout - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeout(f"no database connection available "
+                                      f"within {self.timeout}s (pool size {self.size})")
+                waited = True
+                self._cond.wait(remaining)
+
+    def _count_checkout(self, start: float, waited: bool) -> None:
+        self._stats['checkouts'] += 1
+        if waited:
+            self._stats['waits'] += 1
+            self._stats['wait_seconds'] += time.monotonic() - start
+
+    def _close_idle(self, max_idle: float) -> None:
+        now = time.monotonic()
+        # LIFO: the longest-idle connections are at the front
+        while self._idle and now - self._idle[0][1] > max_idle:
+            conn, since = self._idle.pop(0)
+            self._discard(conn)
+
+    def _discard(self, conn: Conn) -> None:
+        self._numconns -= 1
+        self._stats['closed'] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass  # it is gone either way
+
+
+_pools: tg.Dict[tg.Tuple[str, int], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias: str, poolsettings: tg.Mapping[str, tg.Any]) -> ConnectionPool:
+    """The pool for DB alias in this process (a forked worker gets its own)."""
+    key = (alias, os.getpid())
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(
+                    size=poolsettings.get('SIZE', 4),
+                    timeout=poolsettings.get('TIMEOUT', 10.0),
+                    max_idle=poolsettings.get('MAX_IDLE', 300.0))
+        return _pools[key]
+
+
+def pool_stats() -> tg.Dict[str, tg.Dict[str, tg.Any]]:
+    """Statistics of this process's pools, by DB alias."""
+    pid = os.getpid()
+    with _pools_lock:
+        return {alias: pool.stats() for (alias, poolpid), pool in _pools.items()
+                if poolpid == pid}
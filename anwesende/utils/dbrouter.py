@@ -0,0 +1,55 @@
+"""
+Optional read replica (settings.USE_REPLICA, from DATABASE_REPLICA_URL):
+reads made within reading_from_replica() go to the 'replica' database,
+all other reads and all writes go to 'default'.
+The replica may lag behind, so only reports and searches use it;
+check-ins, imports, and pages that must see their own writes
+(such as the occupancy on the thank-you page) never do.
+Sessions, users, and their groups are always read from 'default',
+also within reading_from_replica(): a user who has just logged in
+or been made Datenverwalter must be recognized at once.
+"""
+import contextlib
+import threading
+import typing as tg
+
+from django.conf import settings
+
+DEFAULT = 'default'
+REPLICA = 'replica'
+PRIMARY_APPS = ('sessions', 'auth', 'account', 'users')  # read from DEFAULT only
+
+_state = threading.local()
+
+
+@contextlib.contextmanager
+def reading_from_replica() -> tg.Iterator[None]:
+    previous = getattr(_state, 'on_replica', False)
+    _state.on_replica = True
+    try:
+        yield
+    finally:
+        _state.on_replica = previous
+
+
+def read_alias() -> str:
+    """The database that reads go to right now."""
+    if settings.USE_REPLICA and getattr(_state, 'on_replica', False):
+        return REPLICA
+    return DEFAULT
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints) -> str:
+        if model._meta.app_label in PRIMARY_APPS:
+            return DEFAULT
+        return read_alias()
+
+    def db_for_write(self, model, **hints) -> str:
+        return DEFAULT
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool:
+        return True  # same data
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints) -> bool:
+        return db != REPLICA  # it gets the schema by replication
@@ -0,0 +1,146 @@
+"""
+Non-blocking logging (settings.LOG_QUEUE_SIZE > 0, used via LOGGING_CONFIG):
+configure() sets up logging as usual and then puts each configured
+logger's handlers behind one BackgroundHandler.
+Logging calls then only enqueue the record; one listener thread per
+process formats the records and writes them to the real handlers,
+in batches with one flush per batch and file.
+Records (and their args) are formatted in the listener thread,
+so do not log objects that you modify afterwards.
+
+Back-pressure: when the queue is full, records below WARNING are dropped
+(and the number of drops is logged later), more important ones wait.
+Remaining records are written at process exit.
+"""
+import atexit
+import logging
+import logging.config
+import os
+import queue
+import threading
+import typing as tg
+
+from django.conf import settings
+
+BATCH_SIZE = 200  # records written per flush, at most
+
+Item = tg.Tuple[tg.Sequence[logging.Handler], logging.LogRecord]
+
+_queue: "queue.Queue[Item]" = queue.Queue()
+_listener_pid = None  # process that has started its listener thread
+_listener_lock = threading.Lock()
+_dropped = 0
+
+
+def configure(logging_settings: tg.Dict[str, tg.Any]) -> None:
+    """LOGGING_CONFIG function: like dictConfig, then move handlers to the background."""
+    logging.config.dictConfig(logging_settings)
+    if settings.LOG_QUEUE_SIZE <= 0:
+        return
+    names = [""] + list(logging_settings.get('loggers', {}))  # "": root logger
+    for logger in (logging.getLogger(name) for name in names):
+        if logger.handlers:
+            logger.handlers = [BackgroundHandler(logger.handlers)]
+
+
+class BackgroundHandler(logging.Handler):
+    """Hands records over to the listener thread, which passes them to targets."""
+    def __init__(self, targets: tg.Sequence[logging.Handler]):
+        super().__init__()
+        self.targets = list(targets)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        global _dropped
+        _ensure_listener()
+        try:
+            if record.levelno >= logging.WARNING:
+                _queue.put((self.targets, record))
+            else:
+                _queue.put_nowait((self.targets, record))
+        except queue.Full:
+            _dropped += 1  # not thread-safe, but only informational
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        # like Handler.handle, but without the handler lock: the queue has its own
+        rv = self.filter(record)
+        if rv:
+            self.emit(record)
+        return bool(rv)
+
+
+def drain() -> None:
+    """Write all queued records now (in the calling thread)."""
+    while _write_batch(block=False):
+        pass
+
+
+def _ensure_listener() -> None:
+    global _listener_pid, _queue
+    if _listener_pid == os.getpid():
+        return
+    with _listener_lock:
+        if _listener_pid != os.getpid():  # also true in a freshly forked worker
+            _queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+            _listener_pid = os.getpid()
+            threading.Thread(target=_listener_loop, name="log-listener",
+                             daemon=True).start()
+            atexit.register(drain)
+
+
+def _listener_loop() -> None:
+    while True:
+        _write_batch(block=True)
+
+
+def _write_batch(block: bool) -> int:
+    global _dropped
+    try:
+        batch = [_queue.get(block=block)]
+    except queue.Empty:
+        return 0
+    while len(batch) < BATCH_SIZE:
+        try:
+            batch.append(_queue.get_nowait())
+        except queue.Empty:
+            break
+    if _dropped:
+        dropped, _dropped = _dropped, 0
+        record = logging.LogRecord(__name__, logging.WARNING, __file__, 0,
+                                   "log queue was full: %d records dropped",
+                                   (dropped,), None)
+        batch.append((batch[-1][0], record))
+    streams: tg.Dict[logging.StreamHandler, tg.List[str]] = {}
+    for targets, record in batch:
+        for handler in targets:
+            if record.levelno < handler.level:
+                continue
+            if type(handler) in (logging.StreamHandler, logging.FileHandler):  # not subclasses
+                if handler.filter(record):
+                    streams.setdefault(tg.cast(logging.StreamHandler, handler), []).append(
+                            _formatted(handler, record))
+            else:
+                handler.handle(record)  # e.g. rotating or mail handlers
+    for handler, lines in streams.items():
+        _write_lines(handler, lines)
+    return len(batch)
+
+
+def _formatted(handler: logging.Handler, record: logging.LogRecord) -> str:
+    try:
+        return handler.format(record)
+    except Exception:
+        return f"{record.levelname} unformattable log record: {record.msg!r}"
+
+
+def _write_lines(handler: logging.StreamHandler, lines: tg.List[str]) -> None:
+    # what StreamHandler.emit does per record, once per batch:
+    handler.acquire()
+    try:
+        if isinstance(handler, logging.FileHandler) and handler.stream is None:
+            handler.stream = handler._open()
+        handler.stream.write("".join(line + handler.terminator for line in lines))
+        handler.flush()
+    except Exception:
+        pass  # logging must never break the listener
+    finally:
+        handler.release()
@@ -0,0 +1,198 @@
+"""
+Minimal Prometheus-style metrics (counters, gauges, histograms) for all
+gunicorn workers: each process counts in memory and writes its totals
+to METRICS_DIR/<pid>.json every DUMP_SECONDS (see maybe_dump());
+render() adds up the files of all processes into the Prometheus text format.
+Gauges are set when writing, e.g. from the connection pools' statistics.
+Files of processes that are gone (e.g. workers recycled by
+gunicorn --max-requests) are deleted, as are files not updated for more
+than MAX_AGE_SECONDS, so totals may drop
+(Prometheus treats that as a counter reset).
+Without settings.METRICS_DIR, nothing is written.
+METRICS_DIR must not be shared by several hosts or containers:
+the pids in the file names are only meaningful within one.
+"""
+import contextlib
+import glob
+import json
+import os
+import threading
+import time
+import typing as tg
+
+from django.conf import settings
+
+import anwesende.utils.dbpool.pool as audp
+
+BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)  # seconds
+DUMP_SECONDS = 5.0
+MAX_AGE_SECONDS = 24 * 3600
+
+Histogram = tg.Dict[str, tg.Any]  # bucket counts (non-cumulative), sum, count
+
+_lock = threading.Lock()
+_counters: tg.Dict[str, float] = {}  # series -> value
+_gauges: tg.Dict[str, float] = {}  # series -> value
+_histograms: tg.Dict[str, Histogram] = {}  # series -> histogram
+_last_dump = 0.0
+
+
+def inc(name: str, value: float = 1.0, **labels: str) -> None:
+    series = _series(name, labels)
+    with _lock:
+        _counters[series] = _counters.get(series, 0.0) + value
+
+
+def set_gauge(name: str, value: float, **labels: str) -> None:
+    series = _series(name, labels)
+    with _lock:
+        _gauges[series] = value
+
+
+def observe(name: str, value: float, **labels: str) -> None:
+    series = _series(name, labels)
+    with _lock:
+        hist = _histograms.setdefault(
+                series, dict(buckets=[0] * (len(BUCKETS) + 1), sum=0.0, count=0))
+        hist['buckets'][_bucket_index(value)] += 1
+        hist['sum'] += value
+        hist['count'] += 1
+
+
+@contextlib.contextmanager
+def timed(name: str, **labels: str) -> tg.Iterator[None]:
+    """Observe the duration of the with-block in histogram name."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def maybe_dump() -> None:
+    """Write this process's metrics file if the last write is old enough."""
+    if time.monotonic() - _last_dump >= DUMP_SECONDS:
+        dump()
+
+
+def dump() -> None:
+    global _last_dump
+    _set_pool_gauges()
+    if not settings.METRICS_DIR:
+        return
+    with _lock:
+        _last_dump = time.monotonic()
+        content = json.dumps(dict(counters=_counters, gauges=_gauges,
+                                  histograms=_histograms))
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    filename = os.path.join(settings.METRICS_DIR, f"{os.getpid()}.json")
+    tmpname = filename + ".tmp"
+    with open(tmpname, 'w', encoding='utf8') as f:
+        f.write(content)
+    os.replace(tmpname, filename)  # readers never see half a file
+
+
+def render() -> str:
+    """All processes' metrics, added up, in Prometheus text format."""
+    dump()
+    counters: tg.Dict[str, float] = {}
+    gauges: tg.Dict[str, float] = {}
+    histograms: tg.Dict[str, Histogram] = {}
+    for data in _read_all():
+        for series, value in data['counters'].items():
+            counters[series] = counters.get(series, 0.0) + value
+        for series, value in data.get('gauges', {}).items():
+            gauges[series] = gauges.get(series, 0.0) + value
+        for series, hist in data['histograms'].items():
+            total = histograms.setdefault(
+                    series, dict(buckets=[0] * (len(BUCKETS) + 1), sum=0.0, count=0))
+            total['buckets'] = [a + b for a, b in zip(total['buckets'], hist['buckets'])]
+            total['sum'] += hist['sum']
+            total['count'] += hist['count']
+    lines: tg.List[str] = []
+    typed: tg.Set[str] = set()
+    for kind, values in (("counter", counters), ("gauge", gauges)):
+        for series in sorted(values):
+            name = series.split("{")[0]
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{series} {values[series]:g}")
+    for series in sorted(histograms):
+        name, labels = _split(series)
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} histogram")
+        hist = histograms[series]
+        cumulative = 0
+        for le, count in zip([*(f"{b:g}" for b in BUCKETS), "+Inf"], hist['buckets']):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels}{"," if labels else ""}le="{le}"}} {cumulative}')
+        braced = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{braced} {hist['sum']:g}")
+        lines.append(f"{name}_count{braced} {hist['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    """Forget this process's metrics (for tests)."""
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _histograms.clear()
+
+
+def _read_all() -> tg.Iterator[tg.Mapping[str, tg.Any]]:
+    if not settings.METRICS_DIR:
+        with _lock:  # copy, as dump() does: other threads keep counting
+            content = json.dumps(dict(counters=_counters, gauges=_gauges,
+                                      histograms=_histograms))
+        yield json.loads(content)
+        return
+    now = time.time()
+    for filename in glob.glob(os.path.join(settings.METRICS_DIR, "*.json")):
+        try:
+            if (not _is_alive(filename) or
+                    now - os.path.getmtime(filename) > MAX_AGE_SECONDS):
+                os.remove(filename)  # process is gone
+                continue
+            with open(filename, encoding='utf8') as f:
+                yield json.load(f)
+        except (OSError, ValueError):
+            continue  # removed meanwhile or unreadable: skip it
+
+
+def _is_alive(filename: str) -> bool:
+    """Whether the process that wrote METRICS_DIR/<pid>.json still exists."""
+    try:
+        os.kill(int(os.path.basename(filename).split(".")[0]), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, ValueError):
+        pass  # exists, but not ours; or not a pid
+    return True
+
+
+def _set_pool_gauges() -> None:
+    for alias, stats in audp.pool_stats().items():
+        for key in ('checkouts', 'waits', 'timeouts', 'in_use', 'idle'):
+            set_gauge(f"anwesende_db_pool_{key}", stats[key], db=alias)
+
+
+def _series(name: str, labels: tg.Mapping[str, str]) -> str:
+    if not labels:
+        return name
+    inner = ",".join(f'{key}="{value}"' for key, value in sorted(labels.items()))
+    return f"{name}{{{inner}}}"
+
+
+def _split(series: str) -> tg.Tuple[str, str]:
+    name, _, rest = series.partition("{")
+    return name, rest.rstrip("}")
+
+
+def _bucket_index(value: float) -> int:
+    for i, bound in enumerate(BUCKETS):
+        if value <= bound:
+            return i
+    return len(BUCKETS)
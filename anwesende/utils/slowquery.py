@@ -0,0 +1,80 @@
+"""
+Slow-query capture (settings.SLOW_QUERY_MS > 0, see SlowQueryMiddleware):
+each query slower than that is logged (logger 'slowquery') with its view.
+SELECTs also get an EXPLAIN (ANALYZE, BUFFERS) plan, made out of band by a
+background thread per process in a READ ONLY transaction on the same
+database alias, at most once per EXPLAIN_INTERVAL for the same SQL text.
+The plans show when growing data makes PostgreSQL switch from index
+to sequential scans.
+"""
+import logging
+import queue
+import threading
+import time
+import typing as tg
+
+import django.db as djdb
+
+EXPLAIN_INTERVAL = 600  # seconds
+EXPLAIN_TIMEOUT_MS = 60000
+QUEUE_SIZE = 20  # further slow queries are not explained while it is full
+
+logger = logging.getLogger('slowquery')
+_queue: "queue.Queue[tg.Tuple[str, str, str, tg.Any]]" = queue.Queue(maxsize=QUEUE_SIZE)
+_explained: tg.Dict[str, float] = {}  # sql -> when it was last queued, oldest first
+_lock = threading.Lock()
+_worker: tg.Optional[threading.Thread] = None
+
+
+def capture(view: str, alias: str, sql: str, params: tg.Any, seconds: float) -> None:
+    logger.warning(f"{1000 * seconds:.0f}ms in {view} [{alias}]: {sql} -- {params!r}")
+    if not sql.lstrip()[:6].upper() == "SELECT":
+        return  # EXPLAIN ANALYZE would execute it again
+    now = time.monotonic()
+    with _lock:
+        if now - _explained.get(sql, -EXPLAIN_INTERVAL) < EXPLAIN_INTERVAL:
+            return
+        _explained.pop(sql, None)
+        _explained[sql] = now  # newest last
+        oldest = next(iter(_explained))
+        while now - _explained[oldest] >= EXPLAIN_INTERVAL:
+            del _explained[oldest]  # would be explained again anyway
+            oldest = next(iter(_explained))
+        _ensure_worker()
+    try:
+        _queue.put_nowait((view, alias, sql, params))
+    except queue.Full:
+        pass
+
+
+def explain(alias: str, sql: str, params: tg.Any) -> str:
+    """The EXPLAIN (ANALYZE, BUFFERS) output for a query, as one string."""
+    connection = djdb.connections[alias]
+    outermost = not connection.in_atomic_block
+    with djdb.transaction.atomic(using=alias):
+        with connection.cursor() as cursor:
+            if outermost:
+                cursor.execute("SET TRANSACTION READ ONLY")
+            cursor.execute("SET LOCAL statement_timeout = %s", [EXPLAIN_TIMEOUT_MS])
+            cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + sql, params)
+            return "\n".join(row[0] for row in cursor.fetchall())
+
+
+def _ensure_worker() -> None:
+    global _worker
+    if _worker is None or not _worker.is_alive():  # e.g. in a forked process
+        _worker = threading.Thread(target=_explain_loop, name="slowquery-explain",
+                                   daemon=True)
+        _worker.start()
+
+
+def _explain_loop() -> None:
+    while True:
+        view, alias, sql, params = _queue.get()
+        try:
+            plan = explain(alias, sql, params)
+            logger.warning(f"plan for query in {view} [{alias}]: {sql}\n{plan}")
+        except Exception as err:
+            logger.warning(f"could not explain query in {view}: {err}")
+        finally:
+            djdb.connections.close_all()  # do not keep a connection for this
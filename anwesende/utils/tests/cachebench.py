@@ -0,0 +1,70 @@
+#!/bin/env python
+"""
+A stand-alone benchmark (needs Django, not the anwesende database)
+comparing the per-process LocMemCache with the FileBasedCache
+used as the 'shared' tier in production (see anwesende/utils/cache.py).
+
+Simulates nproc gunicorn workers that each look up the same numkeys keys
+(cache-aside, like checkin.seat_id_by_hash) in random order and reports
+per-lookup time and the number of misses, i.e. of database queries
+that would be needed.
+"""
+import multiprocessing as mp
+import random
+import sys
+import tempfile
+import time
+import typing as tg
+
+from django.conf import settings
+import django.core.cache.backends.filebased as djccbf
+import django.core.cache.backends.locmem as djccbl
+
+usage_msg = """usage: python cachebench.py nproc numkeys lookups_per_proc
+  e.g. python cachebench.py 5 2000 20000
+"""
+
+
+def lookups(backend: str, location: str, numkeys: int, numlookups: int
+            ) -> tg.Tuple[float, int]:
+    cache = _make_cache(backend, location)
+    misses = 0
+    start = time.perf_counter()
+    for i in range(numlookups):
+        key = f"seat_id:{random.randrange(numkeys)}"
+        if cache.get(key) is None:
+            misses += 1
+            cache.set(key, i, 300)
+    return (time.perf_counter() - start, misses)
+
+
+def _make_cache(backend: str, location: str):
+    params = dict(OPTIONS=dict(MAX_ENTRIES=100000))
+    if backend == 'locmem':
+        return djccbl.LocMemCache(location, params)
+    return djccbf.FileBasedCache(location, params)
+
+
+def run(backend: str, location: str, nproc: int, numkeys: int, numlookups: int):
+    with mp.Pool(nproc) as pool:  # one process per simulated worker
+        results = pool.starmap(lookups, [(backend, location, numkeys, numlookups)] * nproc)
+    seconds = sum(r[0] for r in results)
+    misses = sum(r[1] for r in results)
+    total = nproc * numlookups
+    print(f"{backend:8s}: {1e6 * seconds / total:7.1f} microseconds/lookup, "
+          f"{misses:6d} misses of {total} lookups ({100 * misses / total:.1f}%)")
+
+
+def main():
+    if len(sys.argv) != 4:
+        print(usage_msg)
+        sys.exit(1)
+    nproc, numkeys, numlookups = (int(arg) for arg in sys.argv[1:])
+    settings.configure()
+    run('locmem', 'bench', nproc, numkeys, numlookups)
+    with tempfile.TemporaryDirectory() as cachedir:
+        run('file', cachedir, nproc, numkeys, numlookups)
+
+
+if __name__ == '__main__':
+    main()
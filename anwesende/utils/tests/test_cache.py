@@ -0,0 +1,21 @@
+import anwesende.utils.cache as aucache
+
+
+def test_get_or_compute():
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return 42
+    assert aucache.get_or_compute("k", compute, 10) == 42
+    assert aucache.get_or_compute("k", compute, 10) == 42
+    assert len(calls) == 1  # second one was a hit
+    assert aucache.get_or_compute("none", lambda: None, 10) is None
+    assert aucache.shared().get("none", "absent") == "absent"  # None is not cached
+
+
+def test_add():
+    assert aucache.add("once", 10)
+    assert not aucache.add("once", 10)
+    aucache.delete("once")
+    assert aucache.add("once", 10)
@@ -0,0 +1,100 @@
+import threading
+
+import django.db as djdb
+import pytest
+
+import anwesende.utils.dbpool as audp
+import anwesende.utils.dbpool.base as audpb
+import anwesende.utils.metrics as aumet
+
+
+class FakeConn:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_pool_reuses_and_bounds():
+    pool = audp.ConnectionPool(size=2, timeout=0.05, max_idle=60)
+
+    def checkout():
+        return pool.checkout(FakeConn, is_usable=lambda conn: True)
+
+    c1, c2 = checkout(), checkout()
+    with pytest.raises(audp.PoolTimeout):
+        checkout()  # pool is exhausted
+    pool.checkin(c1)
+    assert checkout() is c1  # reused
+    pool.checkin(c2, reusable=False)
+    assert c2.closed
+    assert checkout() is not c2  # replaced
+    stats = pool.stats()
+    assert (stats['created'], stats['timeouts'], stats['connections']) == (3, 1, 2)
+
+
+def test_pool_waits_for_checkin():
+    pool = audp.ConnectionPool(size=1, timeout=5, max_idle=60)
+    conn = pool.checkout(FakeConn, is_usable=lambda conn: True)
+    threading.Timer(0.05, pool.checkin, [conn]).start()
+    assert pool.checkout(FakeConn, is_usable=lambda conn: True) is conn
+    assert pool.stats()['waits'] == 1
+
+
+def test_pool_closes_idle_and_unusable():
+    pool = audp.ConnectionPool(size=2, timeout=1, max_idle=0, ping_after=0)
+    conn = pool.checkout(FakeConn, is_usable=lambda conn: True)
+    pool.checkin(conn)
+    assert pool.checkout(FakeConn, is_usable=lambda conn: True) is not conn
+    assert conn.closed  # was idle too long
+
+
+def test_pool_pings_without_lock():
+    pool = audp.ConnectionPool(size=1, timeout=1, max_idle=60, ping_after=0)
+    conn = pool.checkout(FakeConn, is_usable=lambda conn: True)
+    pool.checkin(conn)
+    free = []
+
+    def try_lock():
+        free.append(pool._cond.acquire(blocking=False))
+        if free[-1]:
+            pool._cond.release()
+
+    def is_usable(conn):
+        other = threading.Thread(target=try_lock)
+        other.start()
+        other.join()
+        return True
+
+    assert pool.checkout(FakeConn, is_usable) is conn
+    assert free == [True]  # the ping did not hold the lock
+
+
+def test_pool_gauges():
+    pool = audp.pool.get_pool('gaugetest', dict(SIZE=2))
+    conn = pool.checkout(FakeConn, is_usable=lambda conn: True)
+    text = aumet.render()
+    assert '# TYPE anwesende_db_pool_checkouts gauge\n' in text
+    assert 'anwesende_db_pool_checkouts{db="gaugetest"} 1\n' in text
+    assert 'anwesende_db_pool_in_use{db="gaugetest"} 1\n' in text
+    assert 'anwesende_db_pool_idle{db="gaugetest"} 0\n' in text
+    pool.checkin(conn)
+    pool.close_idle()
+    aumet.reset()
+
+
+@pytest.mark.django_db
+def test_pooled_backend():
+    settings_dict = dict(djdb.connection.settings_dict, POOL=dict(SIZE=1),
+                         ENGINE="anwesende.utils.dbpool")
+    for i in range(3):  # like three requests
+        wrapper = audpb.DatabaseWrapper(settings_dict, alias='pooltest')
+        with wrapper.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            assert cursor.fetchone() == (1,)
+        wrapper.close()
+    stats = audp.pool_stats()['pooltest']
+    assert (stats['created'], stats['checkouts'], stats['idle']) == (1, 3, 1)
+    wrapper.pool.close_idle()
+    assert audp.pool_stats()['pooltest']['connections'] == 0
@@ -0,0 +1,44 @@
+import re
+
+import django.db as djdb
+import django.test as djt
+import django.urls as dju
+import pytest
+
+import anwesende.room.models as arm
+import anwesende.room.tests.makedata as artm
+import anwesende.utils.dbrouter as audbr
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+def test_replica_routing():
+    artm.make_seats("room1", 2)  # committed, hence visible on the mirror
+    with audbr.reading_from_replica():
+        assert arm.Room.objects.all().db == 'default'  # USE_REPLICA is off
+    with djt.utils.override_settings(USE_REPLICA=True):
+        with audbr.reading_from_replica():
+            rooms = arm.Room.objects.all()
+            assert rooms.db == 'replica'
+            assert rooms.count() == 1
+            assert audbr.ReplicaRouter().db_for_write(arm.Room) == 'default'
+        assert arm.Room.objects.all().db == 'default'  # only within the context
+
+
+LAGGING_TABLES = re.compile(r'(FROM|JOIN) "(django_session|users_user|users_user_groups)"')
+
+
+def _lagging(execute, sql, params, many, context):
+    """Let the replica see none of the rows of LAGGING_TABLES."""
+    return execute(LAGGING_TABLES.sub(r'\1 (SELECT * FROM "\2" WHERE false) "\2"', sql),
+                   params, many, context)
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+@djt.utils.override_settings(USE_REPLICA=True)
+def test_replica_lag_keeps_login(client):
+    datenverwalter = artm.make_datenverwalter_user()
+    client.force_login(datenverwalter)  # session exists on the primary only
+    with djdb.connections['replica'].execute_wrapper(_lagging):  # type: ignore  # no CM in stubs
+        resp = client.get(dju.reverse('room:report_dept'))
+    assert resp.status_code == 200  # not a redirect to the login page
+    assert resp.context['is_datenverwalter']
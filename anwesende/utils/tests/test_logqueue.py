@@ -0,0 +1,44 @@
+import logging
+import queue
+import time
+
+import django.test as djt
+
+import anwesende.utils.logqueue as aulq
+
+
+def _logger(tmp_path) -> logging.Logger:
+    target = logging.FileHandler(tmp_path / "test.log")
+    target.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    logger = logging.getLogger('logqueue-test')
+    logger.propagate = False
+    logger.handlers = [aulq.BackgroundHandler([target])]
+    return logger
+
+
+@djt.utils.override_settings(LOG_QUEUE_SIZE=100)
+def test_background_handler(tmp_path):
+    logger = _logger(tmp_path)
+    data = dict(a=1)
+    logger.info("data: %s", data)
+    logger.warning("second")
+    data['a'] = 2  # too late: formatted in the background (usually)
+    expected = "data: {'a': %d}\nWARNING second\n"
+    for i in range(100):  # wait for the listener thread
+        if (tmp_path / "test.log").read_text().endswith("WARNING second\n"):
+            break
+        time.sleep(0.01)
+    assert (tmp_path / "test.log").read_text() in ("INFO " + expected % 1,
+                                                   "INFO " + expected % 2)
+
+
+def test_background_handler_drops(tmp_path, monkeypatch):
+    monkeypatch.setattr(aulq, '_ensure_listener', lambda: None)
+    monkeypatch.setattr(aulq, '_queue', queue.Queue(maxsize=2))
+    logger = _logger(tmp_path)
+    for i in range(4):
+        logger.info("record %d", i)
+    aulq.drain()
+    assert (tmp_path / "test.log").read_text() == (
+            "INFO record 0\nINFO record 1\n"
+            "WARNING log queue was full: 2 records dropped\n")
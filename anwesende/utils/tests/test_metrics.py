@@ -0,0 +1,41 @@
+import json
+import os
+import subprocess
+
+import django.test as djt
+
+import anwesende.utils.metrics as aumet
+
+
+def test_render_adds_up_processes(tmp_path):
+    with djt.utils.override_settings(METRICS_DIR=str(tmp_path)):
+        aumet.reset()
+        aumet.inc('x_total', view="a")
+        aumet.inc('x_total', 2, view="a")
+        aumet.observe('y_seconds', 0.02)
+        aumet.observe('y_seconds', 100.0)
+        aumet.dump()
+        ownfile = tmp_path / f"{os.getpid()}.json"
+        other = json.loads(ownfile.read_text())  # pretend another worker...
+        (tmp_path / "1.json").write_text(json.dumps(other))  # ...counted the same
+        text = aumet.render()
+    aumet.reset()
+    assert '# TYPE x_total counter\nx_total{view="a"} 6\n' in text
+    assert 'y_seconds_bucket{le="0.01"} 0\n' in text
+    assert 'y_seconds_bucket{le="0.025"} 2\n' in text
+    assert 'y_seconds_bucket{le="+Inf"} 4\n' in text
+    assert 'y_seconds_count 4\n' in text
+
+
+def test_render_drops_gone_processes(tmp_path):
+    gone = subprocess.Popen(["true"])
+    gone.wait()
+    (tmp_path / f"{gone.pid}.json").write_text(json.dumps(
+            dict(counters={'x_total': 5.0}, histograms={})))
+    with djt.utils.override_settings(METRICS_DIR=str(tmp_path)):
+        aumet.reset()
+        aumet.inc('x_total')
+        text = aumet.render()
+    aumet.reset()
+    assert 'x_total 1\n' in text
+    assert not (tmp_path / f"{gone.pid}.json").exists()
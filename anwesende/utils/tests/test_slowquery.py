@@ -0,0 +1,42 @@
+import typing as tg
+
+import pytest
+
+import anwesende.room.models as arm
+import anwesende.utils.slowquery as auslow
+
+
+@pytest.mark.django_db
+def test_explain():
+    qs = arm.Visit.objects.filter(email__icontains="fam")
+    sql, params = qs.query.sql_with_params()
+    plan = auslow.explain('default', sql, params)
+    assert "Scan on room_visit" in plan
+    assert "actual time=" in plan  # it is EXPLAIN ANALYZE
+
+
+def test_capture_explains_selects_once(caplog, monkeypatch):
+    queued: tg.List[tg.Tuple] = []
+    monkeypatch.setattr(auslow, '_ensure_worker', lambda: None)
+    monkeypatch.setattr(auslow._queue, 'put_nowait', queued.append)
+    monkeypatch.setattr(auslow, '_explained', {})
+    auslow.capture("room:search", 'default', "SELECT 1", (), 3.0)
+    auslow.capture("room:search", 'default', "SELECT 1", (), 3.0)  # explained lately
+    auslow.capture("room:visit", 'default', "INSERT INTO x", (), 3.0)  # not a SELECT
+    assert queued == [("room:search", 'default', "SELECT 1", ())]
+    assert "3000ms in room:search [default]: SELECT 1" in caplog.text
+    assert len(caplog.records) == 3
+
+
+def test_capture_forgets_old_queries(monkeypatch):
+    monkeypatch.setattr(auslow, '_ensure_worker', lambda: None)
+    monkeypatch.setattr(auslow._queue, 'put_nowait', lambda item: None)
+    monkeypatch.setattr(auslow, '_explained', {})
+    now = auslow.time.monotonic()
+    monkeypatch.setattr(auslow.time, 'monotonic', lambda: now)
+    auslow.capture("room:search", 'default', "SELECT 1", (), 3.0)
+    now += auslow.EXPLAIN_INTERVAL / 2
+    auslow.capture("room:search", 'default', "SELECT 2", (), 3.0)
+    now += auslow.EXPLAIN_INTERVAL / 2
+    auslow.capture("room:search", 'default', "SELECT 3", (), 3.0)
+    assert list(auslow._explained) == ["SELECT 2", "SELECT 3"]
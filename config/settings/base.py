@@ -57,6 +57,12 @@ DATABASES = {"default":
                 env.str("POSTGRES_DB")
             ))}
 DATABASES["default"]["ATOMIC_REQUESTS"] = False
+# optional read replica for reports and searches, see anwesende/utils/dbrouter.py:
+USE_REPLICA = bool(env("DATABASE_REPLICA_URL", default=""))
+if USE_REPLICA:
+    DATABASES["replica"] = env.db("DATABASE_REPLICA_URL")
+    DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+DATABASE_ROUTERS = ["anwesende.utils.dbrouter.ReplicaRouter"]
 
 # URLS
 # ------------------------------------------------------------------------------
@@ -136,6 +142,7 @@ AUTH_PASSWORD_VALIDATORS = [
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#middleware
 MIDDLEWARE = [
+    "anwesende.room.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -145,6 +152,9 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.common.BrokenLinkEmailsMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "anwesende.room.middleware.AdmissionControlMiddleware",
+    "anwesende.room.middleware.ProfilingMiddleware",
+    "anwesende.room.middleware.SlowQueryMiddleware",
 ]
 
 # STATIC
@@ -292,6 +302,11 @@ SOCIALACCOUNT_ADAPTER = "anwesende.users.adapters.SocialAccountAdapter"
 # Environment variables
 # ------------------------------------------------------------------------------
 
+ADMISSION_CHECKIN_WAIT_SECONDS = env.float('ADMISSION_CHECKIN_WAIT_SECONDS', 10.0)
+ADMISSION_CONTROL = env.bool('ADMISSION_CONTROL', False)
+ADMISSION_HEAVY_SLOTS = env.int('ADMISSION_HEAVY_SLOTS', 1)
+ADMISSION_HEAVY_WAIT_SECONDS = env.float('ADMISSION_HEAVY_WAIT_SECONDS', 20.0)
+ADMISSION_SLOTS = env.int('ADMISSION_SLOTS', env.int('GUNICORN_THREADS', 3) - 1)
 COOKIE_WITH_RANDOMSTRING = env.bool('COOKIE_WITH_RANDOMSTRING', True)
 DATA_CONTACT = env('DATA_CONTACT')
 DATA_RETENTION_DAYS = env.int('DATA_RETENTION_DAYS', 14)
@@ -299,14 +314,27 @@ DATA_RETENTION_DAYS_STATUS_3G = env.int('DATA_RETENTION_DAYS_STATUS_3G', 2)
 DUMMY_ORG = "uni-dummy.de"
 GDPR_PROCESSOR_URL = env('GDPR_PROCESSOR_URL')
 GDPR_PROCESSOR_NAME = quoted('GDPR_PROCESSOR_NAME')
+# Import threads use pooled connections that admission control does not count,
+# so with DB_POOL_SIZE they are capped at DB_POOL_SIZE - ADMISSION_SLOTS
+# (see anwesende.room.excel.import_workers):
+IMPORT_WORKERS = env.int('IMPORT_WORKERS', 4)
 LEGAL_BASIS_DE = quoted('LEGAL_BASIS_DE')
 LEGAL_BASIS_EN = quoted('LEGAL_BASIS_EN')
+LOG_QUEUE_SIZE = env.int('LOG_QUEUE_SIZE', 10000)
 PRIVACYINFO_DE = quoted('PRIVACYINFO_DE')
 PRIVACYINFO_EN = quoted('PRIVACYINFO_EN')
+METRICS_DIR = env('METRICS_DIR', default='')
 MIN_OVERLAP_MINUTES = env.int('MIN_OVERLAP_MINUTES', 15)
+PROFILE_DIR = env('PROFILE_DIR', default='')
+QUERY_DEADLINE_MS = env.int('QUERY_DEADLINE_MS', 30000)
 SEAT_KEY = env('SEAT_KEY')
 SHORTURL_PREFIX = env('SHORTURL_PREFIX')
+SLOW_QUERY_MS = env.int('SLOW_QUERY_MS', 0)
 STANDBY_MODE = env.bool('STANDBY_MODE', False)
 TECH_CONTACT = env('TECH_CONTACT')
 USE_EMAIL_FIELD = env.bool('USE_EMAIL_FIELD', True) 
-USE_STATUS_3G_FIELD = env.bool('USE_STATUS_3G_FIELD', True) 
+USE_STATUS_3G_FIELD = env.bool('USE_STATUS_3G_FIELD', True)
+VISIT_FLUSH_INTERVAL_MS = env.int('VISIT_FLUSH_INTERVAL_MS', 500)
+VISIT_JOURNAL_DIR = env('VISIT_JOURNAL_DIR', default='/djangolog/visitjournal')
+VISIT_RENDER_THANKYOU = env.bool('VISIT_RENDER_THANKYOU', False)
+VISIT_WRITE_BEHIND = env.bool('VISIT_WRITE_BEHIND', False)
@@ -11,8 +11,20 @@ ALLOWED_HOSTS = env.list("DJANGO_ALLOWED_HOSTS")
 # DATABASES
 # ------------------------------------------------------------------------------
 DATABASES["default"] = env.db("DATABASE_URL")  # noqa F405
-DATABASES["default"]["ATOMIC_REQUESTS"] = True  # noqa F405
+DATABASES["default"]["ATOMIC_REQUESTS"] = True  # except for views.Autocommit views  # noqa F405
 DATABASES["default"]["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=60)  # noqa F405
+if "replica" in DATABASES:  # noqa F405
+    DATABASES["replica"]["CONN_MAX_AGE"] = DATABASES["default"]["CONN_MAX_AGE"]  # noqa F405
+if env.int("DB_POOL_SIZE", default=0):  # noqa F405
+    # bounded connection pool per worker process, see anwesende/utils/dbpool:
+    for db in DATABASES.values():  # noqa F405
+        db["ENGINE"] = "anwesende.utils.dbpool"
+        db["CONN_MAX_AGE"] = 0  # return connection after each request
+        db["POOL"] = dict(
+            SIZE=env.int("DB_POOL_SIZE"),  # noqa F405
+            TIMEOUT=env.float("DB_POOL_TIMEOUT", default=10.0),  # noqa F405
+            MAX_IDLE=env.float("DB_POOL_MAX_IDLE", default=300.0),  # noqa F405
+        )
 
 # CACHES
 # ------------------------------------------------------------------------------
@@ -29,10 +41,15 @@ DATABASES["default"]["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=60)  # no
 #     }
 # }
 CACHES = {
-    'default': {
+    'default': {  # per process
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'the-one-and-only',
-    }
+    },
+    'shared': {  # by all worker processes, see anwesende/utils/cache.py
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': env("SHARED_CACHE_DIR", default="/tmp/anwesende-cache"),  # noqa F405
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
 }
 
 # SECURITY  
@@ -77,6 +94,7 @@ TEMPLATES[-1]["OPTIONS"]["loaders"] = [  # type: ignore[index] # noqa F405
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#logging
 # https://docs.djangoproject.com/en/dev/topics/logging
+LOGGING_CONFIG = "anwesende.utils.logqueue.configure"  # writes in the background
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -118,6 +136,14 @@ LOGGING = {
             "filename": '/djangolog/django-requests.log',
             "formatter": "verbose",
         },
+        "file_slowquery": {
+            "level": "INFO",
+            "class": "logging.handlers.RotatingFileHandler",
+            "filename": '/djangolog/django-slowqueries.log',
+            "maxBytes": 10_000_000,
+            "backupCount": 5,
+            "formatter": "verbose",
+        },
     },
     "loggers": {
         "error": {
@@ -130,6 +156,11 @@ LOGGING = {
             "level": "INFO",
             "propagate": True,
         },
+        "slowquery": {
+            "handlers": ["file_slowquery"],
+            "level": "INFO",
+            "propagate": False,
+        },
     },
     "root": {
         "level": "INFO",